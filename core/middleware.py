@@ -0,0 +1,344 @@
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+from core.routers import (
+    is_pinned_to_primary,
+    is_pinned_to_primary_async,
+    pin_to_primary,
+    pin_to_primary_async,
+    routing,
+)
+
+logger = logging.getLogger("storefront.sql")
+
+SQL_INSTRUMENTATION_DEFAULTS = {
+    # Share of requests that are instrumented, between 0 and 1.
+    "SAMPLE_RATE": 0.05,
+    # Add X-DB-* headers to instrumented responses.
+    "HEADERS": False,
+    # Emit one JSON log line per instrumented request.
+    "LOG": True,
+    # Number of slowest statements to report.
+    "SLOWEST": 3,
+    # Executions of the same statement with different parameters that are
+    # reported as a likely N+1.
+    "N_PLUS_ONE_THRESHOLD": 5,
+    # Statements are truncated to this many characters in reports.
+    "MAX_SQL_LENGTH": 300,
+}
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, repr(params), time.perf_counter() - started))
+
+    def summarize(self, slowest, n_plus_one_threshold, max_sql_length):
+        statements = Counter(sql for sql, _, _ in self.queries)
+        executions = Counter((sql, params) for sql, params, _ in self.queries)
+        return {
+            "queries": len(self.queries),
+            "db_ms": round(sum(seconds for _, _, seconds in self.queries) * 1000, 2),
+            "slowest": [
+                {"sql": sql[:max_sql_length], "ms": round(seconds * 1000, 2)}
+                for sql, _, seconds in sorted(
+                    self.queries, key=lambda query: query[2], reverse=True
+                )[:slowest]
+            ],
+            "duplicates": [
+                {"sql": sql[:max_sql_length], "count": count}
+                for (sql, _), count in executions.most_common()
+                if count > 1
+            ],
+            "n_plus_one": [
+                {"sql": sql[:max_sql_length], "count": count}
+                for sql, count in statements.most_common()
+                if count >= n_plus_one_threshold
+            ],
+        }
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Records every statement a sampled request runs, on every database
+    connection, through `execute_wrapper`, so it also works with DEBUG off.
+    Reports the count, total DB time, slowest statements, exact duplicates
+    and statements repeated often enough to be an N+1.
+
+    Connections belong to a thread. Under ASGI a request's queries, from sync
+    views and the async ORM alike, run in the request's thread-sensitive
+    sync thread, so the recorder is installed there rather than on the
+    event loop's connections.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {
+            **SQL_INSTRUMENTATION_DEFAULTS,
+            **getattr(settings, "SQL_INSTRUMENTATION", {}),
+        }
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.config["SAMPLE_RATE"]:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.install(stack, recorder)
+            response = self.get_response(request)
+        return self.report(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        if random.random() >= self.config["SAMPLE_RATE"]:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, recorder, started)
+
+    def install(self, stack, recorder):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+
+    def report(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        summary = recorder.summarize(
+            self.config["SLOWEST"],
+            self.config["N_PLUS_ONE_THRESHOLD"],
+            self.config["MAX_SQL_LENGTH"],
+        )
+        if self.config["HEADERS"]:
+            response["X-DB-Query-Count"] = summary["queries"]
+            response["X-DB-Time-Ms"] = summary["db_ms"]
+            response["X-DB-Duplicate-Queries"] = len(summary["duplicates"])
+            response["X-DB-N-Plus-One"] = len(summary["n_plus_one"])
+        if self.config["LOG"]:
+            level = logging.WARNING if summary["n_plus_one"] else logging.INFO
+            logger.log(
+                level,
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "duration_ms": round(duration * 1000, 2),
+                        **summary,
+                    }
+                ),
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets `core.routers.ReplicaRouter` serve safe requests from a replica.
+    A client that wrote anything reads from the primary for the next
+    DATABASE_REPLICA_PIN_SECONDS, so it sees its own writes despite lag.
+
+    Raw SQL writes bypass the router, so every successful unsafe request
+    pins as well as any request the router saw write.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def may_use_replica(self, request):
+        return request.method in self.SAFE_METHODS and bool(
+            getattr(settings, "DATABASE_REPLICAS", [])
+        )
+
+    def should_pin(self, request, response, state):
+        if state.wrote:
+            return True
+        return request.method not in self.SAFE_METHODS and response.status_code < 400
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        use_replica = self.may_use_replica(request)
+        if use_replica:
+            use_replica = not is_pinned_to_primary(request)
+        with routing(use_replica) as state:
+            response = self.get_response(request)
+        if self.should_pin(request, response, state):
+            pin_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        use_replica = self.may_use_replica(request)
+        if use_replica:
+            use_replica = not await is_pinned_to_primary_async(request)
+        with routing(use_replica) as state:
+            response = await self.get_response(request)
+        if self.should_pin(request, response, state):
+            await pin_to_primary_async(request)
+        return response
+
+
+ADMISSION_CONTROL_DEFAULTS = {
+    # Path prefixes whose writes are admission controlled.
+    "PATHS": ["/store/carts/", "/store/orders/"],
+    # Bounds and starting point of the adaptive limit on concurrent writes.
+    "MIN_LIMIT": 2,
+    "MAX_LIMIT": 64,
+    "INITIAL_LIMIT": 16,
+    # Writes slower than this shrink the limit, faster ones grow it.
+    "TARGET_LATENCY_MS": 500,
+    # Factor applied to the limit after a slow write.
+    "BACKOFF": 0.75,
+    # Writes that waited longer than this in front of the app (according to
+    # the proxy's X-Request-Start header) are rejected unprocessed.
+    "MAX_QUEUE_MS": 2000,
+    # Seconds clients are asked to wait in Retry-After.
+    "RETRY_AFTER": 1,
+}
+
+
+class AdmissionController:
+    """
+    Caps concurrent requests with a limit adjusted by AIMD: each request
+    finishing under the target latency raises the limit by one, each slower
+    one multiplies it by the backoff factor.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.limit = float(config["INITIAL_LIMIT"])
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        with self.lock:
+            if self.in_flight >= math.floor(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            if seconds * 1000 > self.config["TARGET_LATENCY_MS"]:
+                self.limit = max(
+                    self.config["MIN_LIMIT"], self.limit * self.config["BACKOFF"]
+                )
+            else:
+                self.limit = min(self.config["MAX_LIMIT"], self.limit + 1)
+
+
+def get_queue_seconds(request):
+    """
+    Time the request spent queued in front of the app, from an
+    `X-Request-Start: t=<epoch>` header in seconds, milliseconds or
+    microseconds, or None.
+    """
+    header = request.META.get("HTTP_X_REQUEST_START", "")
+    try:
+        started = float(header.removeprefix("t="))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(time.time() - started, 0)
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds cart and checkout writes with `503 Service Unavailable` and
+    `Retry-After` before they reach the database once too many are in
+    flight, or when they already queued too long, so latency stays bounded
+    under load instead of every request timing out on locks.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {
+            **ADMISSION_CONTROL_DEFAULTS,
+            **getattr(settings, "ADMISSION_CONTROL", {}),
+        }
+        self.controller = AdmissionController(self.config)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def is_guarded(self, request):
+        return request.method not in ("GET", "HEAD", "OPTIONS") and any(
+            request.path.startswith(prefix) for prefix in self.config["PATHS"]
+        )
+
+    def admit(self, request):
+        queued = get_queue_seconds(request)
+        if queued is not None and queued * 1000 > self.config["MAX_QUEUE_MS"]:
+            return False
+        return self.controller.try_acquire()
+
+    def reject(self):
+        response = JsonResponse(
+            {"detail": "The store is busy, please retry shortly."}, status=503
+        )
+        response["Retry-After"] = str(self.config["RETRY_AFTER"])
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_guarded(request):
+            return self.get_response(request)
+        if not self.admit(request):
+            return self.reject()
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self.controller.release(time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.is_guarded(request):
+            return await self.get_response(request)
+        if not self.admit(request):
+            return self.reject()
+        started = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            self.controller.release(time.perf_counter() - started)
@@ -0,0 +1,177 @@
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+DEFAULT_REPLICA_MODELS = [
+    "store.collection",
+    "store.product",
+    "store.productimage",
+    "store.promotion",
+    "store.review",
+]
+
+PIN_CACHE_KEY = "db:pin:{}"
+
+
+class RoutingState:
+    def __init__(self, use_replica=False):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+# Replica alias -> time.monotonic() before which it is not tried again.
+_unhealthy = {}
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+@contextmanager
+def routing(use_replica):
+    """
+    Lets the router send catalog reads to a replica for the duration of the
+    block, and records whether anything was written in it.
+    """
+    state = RoutingState(use_replica=use_replica)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Sends the block's reads to the primary even in a replica routed request,
+    for results that outlive the request, such as shared cache entries.
+    """
+    state = _state.get()
+    if state is None or not state.use_replica:
+        yield
+        return
+    state.use_replica = False
+    try:
+        yield
+    finally:
+        state.use_replica = True
+
+
+def _get_token_user_id(request):
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        # A malformed header is rejected later by authentication itself.
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        return authentication.get_validated_token(raw_token)[api_settings.USER_ID_CLAIM]
+    except (AuthenticationFailed, KeyError):
+        return None
+
+
+def _pin_key(request):
+    # JWT clients are told apart by their user, so the pin survives token
+    # refreshes, browsers by their session.
+    user_id = _get_token_user_id(request)
+    if user_id is not None:
+        client = f"user:{user_id}"
+    else:
+        client = request.COOKIES.get(settings.SESSION_COOKIE_NAME) or request.META.get(
+            "REMOTE_ADDR", ""
+        )
+    return PIN_CACHE_KEY.format(hashlib.sha1(client.encode()).hexdigest())
+
+
+def pin_to_primary(request):
+    """Sends the client's reads to the primary for a while after a write."""
+    cache.set(
+        _pin_key(request), True, getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+    )
+
+
+async def pin_to_primary_async(request):
+    await cache.aset(
+        _pin_key(request), True, getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+    )
+
+
+def is_pinned_to_primary(request):
+    return cache.get(_pin_key(request), False)
+
+
+async def is_pinned_to_primary_async(request):
+    return await cache.aget(_pin_key(request), False)
+
+
+def mark_unhealthy(alias):
+    _unhealthy[alias] = time.monotonic() + getattr(
+        settings, "DATABASE_REPLICA_RETRY_SECONDS", 30
+    )
+
+
+def choose_replica():
+    """
+    A random replica that accepts connections, or None. Replicas that fail
+    to connect are skipped for DATABASE_REPLICA_RETRY_SECONDS.
+    """
+    replicas = [
+        alias
+        for alias in get_replicas()
+        if _unhealthy.get(alias, 0) <= time.monotonic()
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            mark_unhealthy(alias)
+            continue
+        _unhealthy.pop(alias, None)
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    """
+    Routes catalog reads made inside `routing(use_replica=True)` (safe
+    requests, see `ReplicaRoutingMiddleware`) to a healthy replica. All
+    other reads, every write and everything outside a request (commands,
+    Celery tasks) use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica:
+            return None
+        models = getattr(settings, "DATABASE_REPLICA_MODELS", DEFAULT_REPLICA_MODELS)
+        if model._meta.label_lower not in models:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
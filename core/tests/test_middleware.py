@@ -0,0 +1,61 @@
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import (
+    ADMISSION_CONTROL_DEFAULTS,
+    AdmissionController,
+    AdmissionControlMiddleware,
+)
+
+
+class AdmissionControlTests(SimpleTestCase):
+    def get_middleware(self, get_response=lambda request: HttpResponse(), **config):
+        with override_settings(ADMISSION_CONTROL=config):
+            return AdmissionControlMiddleware(get_response)
+
+    def test_limit_grows_when_fast_and_shrinks_when_slow(self):
+        controller = AdmissionController(
+            {**ADMISSION_CONTROL_DEFAULTS, "INITIAL_LIMIT": 2}
+        )
+        self.assertTrue(controller.try_acquire())
+        self.assertTrue(controller.try_acquire())
+        self.assertFalse(controller.try_acquire())
+
+        controller.release(1.0)
+        self.assertEqual(controller.limit, 2)
+        controller.release(0.01)
+        self.assertEqual(controller.limit, 3)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_writes_over_the_limit_are_shed(self):
+        factory = RequestFactory()
+
+        def get_response(request):
+            # A write arriving while this one is in flight.
+            return middleware(factory.post("/store/orders/"))
+
+        middleware = self.get_middleware(get_response, INITIAL_LIMIT=1, MIN_LIMIT=1)
+        response = middleware(factory.post("/store/carts/"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(middleware.controller.in_flight, 0)
+
+    def test_writes_that_queued_too_long_are_shed(self):
+        middleware = self.get_middleware(MAX_QUEUE_MS=1000)
+        factory = RequestFactory()
+        queued = f"t={time.time() - 5:.3f}"
+        response = middleware(
+            factory.post("/store/carts/", HTTP_X_REQUEST_START=queued)
+        )
+        self.assertEqual(response.status_code, 503)
+        # Reads and other paths are never shed.
+        for request in [
+            factory.get("/store/carts/", HTTP_X_REQUEST_START=queued),
+            factory.post("/store/products/", HTTP_X_REQUEST_START=queued),
+        ]:
+            self.assertEqual(middleware(request).status_code, 200)
+        fresh = f"t={int(time.time() * 1000)}"
+        response = middleware(factory.post("/store/carts/", HTTP_X_REQUEST_START=fresh))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,89 @@
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from store.models import Collection, Product
+from store.tests.helpers import token_client
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica"],
+    # Count the queries of every read, not hits in the response cache.
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "store": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    },
+    STORE_CACHE_ALIAS="store",
+)
+class ReplicaPinningTests(TransactionTestCase):
+    # Committed rows, so the replica connection sees them.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        collection = Collection.objects.create(title="Tools")
+        self.product = Product.objects.create(
+            title="Hammer", unit_price=10, inventory=5, collection=collection
+        )
+        self.user = get_user_model().objects.create_user("customer")
+
+    @contextmanager
+    def count_queries(self):
+        counts = dict.fromkeys(connections, 0)
+
+        def counter(alias):
+            def execute(execute, sql, params, many, context):
+                counts[alias] += 1
+                return execute(sql, params, many, context)
+
+            return execute
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter(alias)))
+            yield counts
+
+    def assertReadsFromReplica(self, client, expected=True, url=None):
+        url = url or f"/store/products/{self.product.id}/reviews/"
+        with self.count_queries() as counts:
+            self.assertEqual(client.get(url).status_code, 200)
+        # Authentication may still read users from the primary.
+        self.assertEqual(counts["replica"] > 0, expected)
+
+    def test_catalog_reads_use_the_replica(self):
+        self.assertReadsFromReplica(APIClient())
+
+    def test_cached_and_versioned_responses_are_read_from_the_primary(self):
+        # They outlive the request under the current versions, which a
+        # lagging replica may not have caught up to.
+        for url in ["/store/products/", "/store/collections/"]:
+            with self.subTest(url=url):
+                self.assertReadsFromReplica(APIClient(), False, url)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        client = token_client(self.user)
+        self.assertEqual(client.post("/store/carts/", {}).status_code, 201)
+        self.assertReadsFromReplica(client, False)
+        # The pin follows the user across token refreshes, not the token.
+        self.assertReadsFromReplica(token_client(self.user), False)
+        self.assertReadsFromReplica(APIClient())
+
+    def test_failed_writes_do_not_pin(self):
+        client = token_client(self.user)
+        response = client.post(
+            "/store/carts/00000000-0000-0000-0000-000000000000/items/",
+            {"product_id": 1, "quantity": 1},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertReadsFromReplica(client)
+
+    def test_malformed_tokens_are_left_to_authentication(self):
+        for header in ["JWT a b", "JWT not-a-token"]:
+            with self.subTest(header=header):
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=header)
+                self.assertEqual(client.get("/store/products/").status_code, 401)
@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count
 from django.urls import reverse
 from django.utils.html import format_html, urlencode
 
@@ -21,18 +20,19 @@ class CollectionAdmin(admin.ModelAdmin):
         )
         return format_html('<a href="{}" >{}</a>', url, collection.products_count)
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(products_count=Count("product"))
-
 
 class ProductImageInline(admin.TabularInline):
     model = models.ProductImage
     readonly_fields = ["thumbnail"]
 
     def thumbnail(self, instance):
-        if instance.image.name != "":
-            return format_html(f'<img src="{instance.image.url}" class="thumbnail />')
-        return ""
+        if instance.image.name == "":
+            return ""
+        # Fall back to the original until the variants have been generated.
+        name = instance.variants.get("thumb", {}).get("name", instance.image.name)
+        return format_html(
+            '<img src="{}" class="thumbnail" />', instance.image.storage.url(name)
+        )
 
 
 @admin.register(models.Product)
@@ -41,7 +41,13 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ["title"]}
     actions = ["clear_inventory"]
     inlines = [ProductImageInline]
-    list_display = ["title", "unit_price", "inventory_status", "collection_title"]
+    list_display = [
+        "title",
+        "unit_price",
+        "effective_price",
+        "inventory_status",
+        "collection_title",
+    ]
     list_editable = ["unit_price"]
     list_per_page = 10
     list_select_related = ["collection"]
@@ -88,4 +94,11 @@ class OrderItemInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     autocomplete_fields = ["customer"]
     inlines = [OrderItemInline]
-    list_display = ["id", "placed_at", "customer"]
+    list_display = ["id", "placed_at", "customer", "payment_status"]
+
+
+@admin.register(models.OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "topic", "status", "attempts", "created_at", "delivered_at"]
+    list_filter = ["status", "topic"]
+    readonly_fields = ["topic", "payload", "created_at", "delivered_at"]
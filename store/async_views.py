@@ -0,0 +1,119 @@
+"""
+Async versions of the hottest read endpoints, for serving under ASGI.
+
+DRF views are sync, so under ASGI each request holds a thread for its
+whole duration. These views use the async ORM instead and return the
+same payloads as their `store.views` counterparts, built by the same
+serializer helpers. The product list validates the same FilterSet as
+`ProductViewSet` in a short trip to the sync thread, then counts and reads
+the page with the async ORM, so both lists filter, paginate and reject bad
+input alike. Search, ordering, caching and
+conditional requests stay with the DRF views.
+"""
+
+from collections import defaultdict
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from store.filters import ProductFilter
+from store.models import Cart, CartItem, Collection, Product
+from store.pagination import DefaultPagination
+from store.serializers import (
+    ProductListSerializer,
+    image_rows,
+    serialize_cart,
+    serialize_products,
+)
+
+
+def render(data, status=200):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, content_type="application/json"
+    )
+
+
+def not_found(detail="Not found."):
+    return render({"detail": detail}, status=404)
+
+
+def error_response(exc):
+    # The body DRF's exception handler would send.
+    if isinstance(exc.detail, (list, dict)):
+        return render(exc.detail, status=exc.status_code)
+    return render({"detail": exc.detail}, status=exc.status_code)
+
+
+async def agroup_image_rows(product_ids):
+    images = defaultdict(list)
+    async for row in image_rows(product_ids):
+        images[row["product_id"]].append(row)
+    return images
+
+
+def filter_products(filterset):
+    # Validating can query, `collection_id` must name a collection, and so
+    # can building the tag filter, so this runs in the sync thread.
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return filterset.qs
+
+
+async def list_products(request):
+    request = Request(request)
+    filterset = ProductFilter(
+        request.query_params,
+        queryset=Product.objects.values(*ProductListSerializer.value_fields),
+        request=request,
+    )
+    products = await sync_to_async(filter_products)(filterset)
+    paginator = DefaultPagination()
+    rows = await paginator.apaginate_queryset(products, request)
+    images = await agroup_image_rows([row["id"] for row in rows])
+    return paginator.get_paginated_response(
+        serialize_products(rows, images, request)
+    ).data
+
+
+@require_safe
+async def product_list(request):
+    try:
+        return render(await list_products(request))
+    except APIException as exc:
+        return error_response(exc)
+
+
+@require_safe
+async def product_detail(request, pk):
+    try:
+        row = await Product.objects.values(*ProductListSerializer.value_fields).aget(
+            pk=pk
+        )
+    except Product.DoesNotExist:
+        return not_found("No Product matches the given query.")
+    images = await agroup_image_rows([row["id"]])
+    return render(serialize_products([row], images, request)[0])
+
+
+@require_safe
+async def collection_list(request):
+    collections = Collection.objects.values("id", "title", "products_count")
+    return render([collection async for collection in collections])
+
+
+@require_safe
+async def cart_detail(request, pk):
+    try:
+        cart_id = UUID(pk)
+    except ValueError:
+        return not_found()
+    rows = [row async for row in CartItem.objects.summary(cart_id)]
+    if not rows and not await Cart.objects.filter(pk=cart_id).aexists():
+        return not_found()
+    return render(serialize_cart(cart_id, rows))
@@ -0,0 +1,146 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from core.routers import primary_reads
+
+GENERATION_SCOPE = "generation"
+CATALOG_SCOPE = "catalog"
+
+STATS_HITS_KEY = "store:cache:hits"
+STATS_MISSES_KEY = "store:cache:misses"
+
+
+def get_cache():
+    return caches[getattr(settings, "STORE_CACHE_ALIAS", "default")]
+
+
+def collection_scope(collection_id):
+    return f"collection:{collection_id}"
+
+
+def product_scope(product_id):
+    return f"product:{product_id}"
+
+
+def _version_key(scope):
+    return f"store:version:{scope}"
+
+
+def get_versions(scopes):
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed evicted versions with a timestamp so they never roll back
+            # onto entries that were written under an older version.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_versions_on_commit(*scopes):
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+def bump_product_versions_on_commit(product_id, *collection_ids):
+    scopes = [product_scope(product_id), CATALOG_SCOPE]
+    scopes += [collection_scope(pk) for pk in set(collection_ids) if pk is not None]
+    bump_versions_on_commit(*scopes)
+
+
+def _incr(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_stats():
+    values = get_cache().get_many([STATS_HITS_KEY, STATS_MISSES_KEY])
+    hits = values.get(STATS_HITS_KEY, 0)
+    misses = values.get(STATS_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([STATS_HITS_KEY, STATS_MISSES_KEY])
+
+
+class CachedResponseMixin:
+    """
+    Caches list and retrieve responses under versioned keys.
+
+    Writes never delete entries; they bump the version of the scopes they
+    touch (see `store.signals.handlers`), which changes the key and leaves the
+    stale entry to expire on its own. Misses are filled from the primary, a
+    lagging replica could store data older than the version in the key.
+    """
+
+    cache_query_params = []
+
+    def get_cache_scopes(self):
+        if self.action == "retrieve":
+            return [
+                product_scope(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            ]
+        return [CATALOG_SCOPE]
+
+    def get_response_cache_key(self, request):
+        scopes = [GENERATION_SCOPE] + self.get_cache_scopes()
+        params = sorted(
+            (name, value)
+            for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+        )
+        raw = repr(
+            (request.get_host(), request.path, params, scopes, get_versions(scopes))
+        )
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f"store:response:{self.basename}:{self.action}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _incr(STATS_HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _incr(STATS_MISSES_KEY)
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, "STORE_CACHE_TIMEOUT", 300))
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from store.models import Cart, CartItem
+
+
+def get_cart_cutoff(ttl_days=None):
+    if ttl_days is None:
+        ttl_days = getattr(settings, "STORE_CART_TTL_DAYS", 30)
+    return timezone.now() - timedelta(days=ttl_days)
+
+
+def count_abandoned_carts(cutoff):
+    carts = Cart.objects.filter(created_at__lt=cutoff)
+    return carts.count(), CartItem.objects.filter(cart__in=carts).count()
+
+
+def purge_abandoned_carts(cutoff, chunk_size=500):
+    """
+    Deletes carts created before `cutoff` with their items, oldest first,
+    and yields `(carts, items)` deleted per chunk.
+
+    Every chunk is its own short transaction, found through the `created_at`
+    index, so the purge never holds locks on more than `chunk_size` carts.
+    """
+    while True:
+        with transaction.atomic():
+            cart_ids = list(
+                Cart.objects.filter(created_at__lt=cutoff)
+                .order_by("created_at")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not cart_ids:
+                return
+            items, _ = CartItem.objects.filter(cart_id__in=cart_ids).delete()
+            carts, _ = Cart.objects.filter(id__in=cart_ids).delete()
+        yield carts, items
@@ -0,0 +1,408 @@
+import codecs
+import csv
+import json
+from collections import Counter, defaultdict, deque
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from store.cache import GENERATION_SCOPE, bump_versions
+from store.counters import adjust_products_count
+from store.models import Collection, Product, Promotion
+from store.pricing import recompute_effective_prices
+from store.search import get_search_backend
+from store.serializers import (
+    CollectionImportSerializer,
+    ProductImportSerializer,
+    PromotionImportSerializer,
+)
+
+ProductPromotion = Product.promotions.through
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+LIST_SEPARATOR = ";"
+
+
+class ModelCatalog:
+    """
+    Exports and upserts one model in chunks. Rows are keyed by `id`: rows
+    with an existing id update it, the others are created.
+
+    An update only writes the fields present in the row, so an NDJSON row
+    may leave out optional fields to keep them. A CSV row has every column
+    of its header, and an empty cell clears the field.
+    """
+
+    model = None
+    serializer_class = None
+    fields = []
+    list_fields = []
+    # Fields new rows are told apart by when ids cannot be returned.
+    natural_key = []
+
+    def export(self, chunk_size=2000):
+        # Seeking on id keeps memory and the cost per chunk constant.
+        last_id = 0
+        while True:
+            rows = list(
+                self.model.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values(*self.fields)[:chunk_size]
+            )
+            if not rows:
+                return
+            yield from self.prepare_export(rows)
+            last_id = rows[-1]["id"]
+
+    def prepare_export(self, rows):
+        return rows
+
+    def import_chunk(self, rows):
+        """
+        Validates and upserts `[(line, row)]` in one transaction and returns
+        `(created, updated, errors)` with errors keyed by line.
+        """
+        valid, errors = [], {}
+        for line, row in rows:
+            serializer = self.serializer_class(data=row)
+            if serializer.is_valid():
+                valid.append((line, serializer.validated_data))
+            else:
+                errors[line] = serializer.errors
+        valid = self.check_references(valid, errors)
+
+        # Within a chunk the last row for an id wins.
+        by_id = {}
+        for line, data in valid:
+            by_id[data.get("id") or ("new", line)] = data
+        try:
+            with transaction.atomic():
+                created, updated = self.save(list(by_id.values()))
+        except DatabaseError as error:
+            for line, _ in valid:
+                errors[line] = {"non_field_errors": [str(error)]}
+            return 0, 0, errors
+        return created, updated, errors
+
+    def check_references(self, rows, errors):
+        return rows
+
+    def save(self, rows):
+        existing = self.get_existing([data["id"] for data in rows if data.get("id")])
+        new, changed = [], []
+        for data in rows:
+            instance = self.build(data)
+            (changed if instance.id in existing else new).append((instance, data))
+
+        self.create([instance for instance, _ in new])
+        # Fields the rows cannot set (last_update) are always written.
+        importable = self.serializer_class().fields
+        by_fields = defaultdict(list)
+        for instance, data in changed:
+            fields = tuple(
+                name
+                for name in self.update_fields
+                if name in data or name not in importable
+            )
+            by_fields[fields].append(instance)
+        for fields, instances in by_fields.items():
+            self.model.objects.bulk_update(instances, fields)
+        self.after_save(new + changed, existing)
+        return len(new), len(changed)
+
+    def get_existing(self, ids):
+        return set(self.model.objects.filter(id__in=ids).values_list("id", flat=True))
+
+    def create(self, instances):
+        connection = connections[self.model.objects.db]
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.model.objects.bulk_create(instances)
+            return
+        # Without RETURNING (MySQL) no insert reports the ids it assigned, so
+        # new rows are read back by their natural key among the rows added
+        # after the current last id, in insertion order.
+        last_id = self.model.objects.aggregate(last=Max("id"))["last"] or 0
+        self.model.objects.bulk_create(instances)
+
+        pending = defaultdict(deque)
+        for instance in instances:
+            if not instance.pk:
+                pending[self.get_natural_key(instance)].append(instance)
+        rows = (
+            self.model.objects.filter(id__gt=last_id)
+            .exclude(id__in=[instance.pk for instance in instances if instance.pk])
+            .order_by("id")
+            .values_list("id", *self.natural_key)
+        )
+        for row_id, *natural_key in rows:
+            waiting = pending.get(tuple(natural_key))
+            if waiting:
+                waiting.popleft().pk = row_id
+        if any(pending.values()):
+            raise DatabaseError("The ids of new rows could not be read back.")
+
+    def get_natural_key(self, instance):
+        return tuple(getattr(instance, name) for name in self.natural_key)
+
+    def build(self, data):
+        return self.model(
+            **{
+                name: value
+                for name, value in data.items()
+                if name not in self.list_fields
+            }
+        )
+
+    def after_save(self, saved, existing):
+        pass
+
+
+class CollectionCatalog(ModelCatalog):
+    model = Collection
+    serializer_class = CollectionImportSerializer
+    fields = ["id", "title"]
+    update_fields = ["title", "last_update"]
+    natural_key = ["title", "last_update"]
+
+    def build(self, data):
+        return Collection(**data, last_update=timezone.now())
+
+
+class PromotionCatalog(ModelCatalog):
+    model = Promotion
+    serializer_class = PromotionImportSerializer
+    fields = ["id", "description", "discount"]
+    update_fields = ["description", "discount"]
+    natural_key = ["description", "discount"]
+
+    def after_save(self, saved, existing):
+        recompute_effective_prices(
+            ProductPromotion.objects.filter(
+                promotion_id__in=[promotion.id for promotion, _ in saved]
+            ).values_list("product_id", flat=True)
+        )
+
+
+class ProductCatalog(ModelCatalog):
+    model = Product
+    serializer_class = ProductImportSerializer
+    fields = [
+        "id",
+        "title",
+        "slug",
+        "description",
+        "unit_price",
+        "inventory",
+        "collection_id",
+    ]
+    list_fields = ["promotion_ids"]
+    natural_key = ["title", "slug", "collection_id", "last_update"]
+    update_fields = [
+        "title",
+        "slug",
+        "description",
+        "unit_price",
+        "inventory",
+        "collection_id",
+        "last_update",
+    ]
+
+    def prepare_export(self, rows):
+        promotion_ids = {row["id"]: [] for row in rows}
+        for product_id, promotion_id in (
+            ProductPromotion.objects.filter(product_id__in=promotion_ids)
+            .order_by("product_id", "promotion_id")
+            .values_list("product_id", "promotion_id")
+        ):
+            promotion_ids[product_id].append(promotion_id)
+        for row in rows:
+            row["promotion_ids"] = promotion_ids[row["id"]]
+        return rows
+
+    def check_references(self, rows, errors):
+        collection_ids = {data["collection_id"] for _, data in rows}
+        promotion_ids = {
+            promotion_id
+            for _, data in rows
+            for promotion_id in data.get("promotion_ids", [])
+        }
+        collection_ids = set(
+            Collection.objects.filter(id__in=collection_ids).values_list(
+                "id", flat=True
+            )
+        )
+        promotion_ids = set(
+            Promotion.objects.filter(id__in=promotion_ids).values_list("id", flat=True)
+        )
+
+        valid = []
+        for line, data in rows:
+            row_errors = {}
+            if data["collection_id"] not in collection_ids:
+                row_errors["collection_id"] = ["No collection with this id."]
+            missing = set(data.get("promotion_ids", [])) - promotion_ids
+            if missing:
+                row_errors["promotion_ids"] = [
+                    f"No promotion with id {promotion_id}."
+                    for promotion_id in sorted(missing)
+                ]
+            if row_errors:
+                errors[line] = row_errors
+            else:
+                valid.append((line, data))
+        return valid
+
+    def build(self, data):
+        product = super().build(data)
+        product.last_update = timezone.now()
+        return product
+
+    def get_existing(self, ids):
+        # The current collection of each product, to move its count.
+        return dict(
+            Product.objects.filter(id__in=ids).values_list("id", "collection_id")
+        )
+
+    def after_save(self, saved, existing):
+        promoted = [
+            (product, data) for product, data in saved if "promotion_ids" in data
+        ]
+        ProductPromotion.objects.filter(
+            product_id__in=[product.id for product, _ in promoted]
+        ).delete()
+        ProductPromotion.objects.bulk_create(
+            [
+                ProductPromotion(product_id=product.id, promotion_id=promotion_id)
+                for product, data in promoted
+                for promotion_id in set(data["promotion_ids"])
+            ]
+        )
+        products = [product for product, _ in saved]
+        product_ids = [product.id for product in products]
+        recompute_effective_prices(product_ids)
+        # Partial rows leave fields unset, the index reads the stored text.
+        get_search_backend().index(
+            Product.objects.filter(id__in=product_ids).only(
+                "id", "title", "description"
+            )
+        )
+
+        counts = Counter()
+        for product in products:
+            previous_collection_id = existing.get(product.id)
+            if previous_collection_id != product.collection_id:
+                counts[product.collection_id] += 1
+                if previous_collection_id is not None:
+                    counts[previous_collection_id] -= 1
+        # In id order, so concurrent imports lock collections alike.
+        for collection_id, delta in sorted(counts.items()):
+            if delta:
+                adjust_products_count(collection_id, delta)
+
+
+CATALOGS = {
+    "collections": CollectionCatalog,
+    "promotions": PromotionCatalog,
+    "products": ProductCatalog,
+}
+
+
+def export_lines(kind, file_format, chunk_size=2000):
+    """
+    Yields the whole table as CSV or NDJSON lines, reading it in chunks so
+    memory use does not grow with the catalog.
+    """
+    catalog = CATALOGS[kind]()
+    rows = catalog.export(chunk_size)
+    if file_format == "ndjson":
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+        return
+
+    columns = catalog.fields + catalog.list_fields
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    yield writer.writerow(columns)
+    for row in rows:
+        for name in catalog.list_fields:
+            row[name] = LIST_SEPARATOR.join(str(value) for value in row[name])
+        yield writer.writerow([row[name] for name in columns])
+
+
+class _LineBuffer:
+    def write(self, value):
+        return value
+
+
+def read_rows(kind, chunks, file_format):
+    """
+    Parses an iterable of byte chunks (an uploaded file or a request body)
+    into `(line, row)` pairs without reading it all into memory. Lines that
+    cannot be parsed yield a `None` row.
+    """
+    lines = codecs.iterdecode(chunks, "utf-8-sig")
+    if file_format == "ndjson":
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+        return
+
+    list_fields = CATALOGS[kind].list_fields
+    reader = csv.DictReader(lines)
+    for row in reader:
+        for name, value in row.items():
+            if name in list_fields:
+                row[name] = [
+                    item for item in (value or "").split(LIST_SEPARATOR) if item
+                ]
+            elif value == "":
+                # CSV cannot tell empty from missing, optional columns are null.
+                row[name] = None
+        yield reader.line_num, row
+
+
+def import_rows(kind, rows, chunk_size=1000, max_errors=100, progress=None):
+    """
+    Upserts `(line, row)` pairs chunk by chunk, each in its own transaction,
+    and returns a summary with the first `max_errors` row errors. Each chunk
+    adjusts the collection counts it changes, caches are invalidated once at
+    the end.
+    """
+    catalog = CATALOGS[kind]()
+    summary = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    def flush(chunk):
+        created, updated, errors = catalog.import_chunk(chunk)
+        summary["created"] += created
+        summary["updated"] += updated
+        summary["failed"] += len(errors)
+        for line in sorted(errors)[: max_errors - len(summary["errors"])]:
+            summary["errors"].append({"line": line, "errors": errors[line]})
+        if progress is not None:
+            progress(summary)
+
+    chunk = []
+    for line, row in rows:
+        if row is None:
+            summary["failed"] += 1
+            if len(summary["errors"]) < max_errors:
+                summary["errors"].append(
+                    {"line": line, "errors": {"non_field_errors": ["Unreadable row."]}}
+                )
+            continue
+        chunk.append((line, row))
+        if len(chunk) == chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    bump_versions(GENERATION_SCOPE)
+    return summary
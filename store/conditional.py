@@ -0,0 +1,95 @@
+import hashlib
+from calendar import timegm
+
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+
+from core.routers import primary_reads
+from store.cache import CATALOG_SCOPE, GENERATION_SCOPE, get_versions
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional list and retrieve requests with `304 Not Modified`
+    before anything is serialized.
+
+    A list is validated by the versions of the cache scopes it depends on
+    (see `store.cache`), which every write bumps, so checking it costs no
+    query however many rows it covers. Its body is read from the primary, as
+    a lagging replica could return data older than the versions in the ETag.
+    A retrieve is validated by the `last_update` of the row it returns; a
+    missing row gets no validators and is left to the handler to answer
+    with 404.
+    """
+
+    last_modified_field = "last_update"
+
+    def get_validator_scopes(self):
+        return [GENERATION_SCOPE, CATALOG_SCOPE]
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_validators(self, request):
+        if self.action == "list":
+            scopes = self.get_validator_scopes()
+            state = (scopes, get_versions(scopes))
+            last_modified = None
+        else:
+            try:
+                row = (
+                    self.get_validator_queryset()
+                    .order_by()
+                    .values(last_modified=F(self.last_modified_field))
+                    .first()
+                )
+            except (TypeError, ValueError, ValidationError):
+                # Malformed lookups are left to the handler to reject.
+                return None, None
+            if row is None:
+                return None, None
+            last_modified = row["last_modified"]
+            state = last_modified.isoformat() if last_modified else None
+
+        raw = repr((request.get_full_path(), request.accepted_renderer.format, state))
+        etag = f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+        if last_modified is not None:
+            last_modified = timegm(last_modified.utctimetuple())
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = None
+        if etag is not None:
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+        if response is None:
+            if self.action == "list":
+                with primary_reads():
+                    response = handler(request, *args, **kwargs)
+            else:
+                response = handler(request, *args, **kwargs)
+
+        if etag is not None and response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            # Clients may keep the payload but must revalidate before reuse.
+            patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ["Accept"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,48 @@
+from django.db.models import Count, F
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+
+from store.models import Collection, Product
+
+
+def adjust_products_count(collection_id, delta):
+    if delta < 0:
+        # Stops at zero when the count has drifted low, without ever forming
+        # a negative intermediate that an unsigned column would reject.
+        removed = -delta
+        products_count = Greatest(F("products_count"), removed) - removed
+    else:
+        products_count = F("products_count") + delta
+    Collection.objects.filter(pk=collection_id).update(
+        products_count=products_count, last_update=Now()
+    )
+
+
+def recount_products(fix=True):
+    """
+    Compares every stored `Collection.products_count` with the real number of
+    products and returns the mismatches as `(collection, stored, actual)`.
+    Mismatches are corrected unless `fix` is False.
+    """
+    actual_counts = dict(
+        Product.objects.order_by()
+        .values_list("collection_id")
+        .annotate(count=Count("id"))
+    )
+    mismatches = []
+    for collection in Collection.objects.only(
+        "id", "title", "products_count", "last_update"
+    ):
+        actual = actual_counts.get(collection.id, 0)
+        if collection.products_count != actual:
+            mismatches.append((collection, collection.products_count, actual))
+            collection.products_count = actual
+            collection.last_update = timezone.now()
+
+    if fix:
+        Collection.objects.bulk_update(
+            [collection for collection, _, _ in mismatches],
+            ["products_count", "last_update"],
+            batch_size=1000,
+        )
+    return mismatches
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+DEFAULT_PRICE_BUCKETS = [10, 25, 50, 100]
+
+
+def get_price_bounds():
+    return [
+        Decimal(str(bound))
+        for bound in getattr(settings, "STORE_PRICE_BUCKETS", DEFAULT_PRICE_BUCKETS)
+    ]
+
+
+def price_bucket_expression(bounds):
+    """Index of the `[lower, upper)` price range each product falls in."""
+    return Case(
+        *[
+            When(unit_price__lt=bound, then=Value(index))
+            for index, bound in enumerate(bounds)
+        ],
+        default=Value(len(bounds)),
+        output_field=IntegerField(),
+    )
+
+
+def facet_counts(products):
+    """
+    Collection and price bucket counts for a product queryset, from a single
+    GROUP BY over (collection, bucket) whose rows are summed per facet.
+    """
+    bounds = get_price_bounds()
+    rows = (
+        products.order_by()
+        .annotate(price_bucket=price_bucket_expression(bounds))
+        .values("collection_id", "collection__title", "price_bucket")
+        .annotate(count=Count("id"))
+    )
+
+    collections = {}
+    prices = [0] * (len(bounds) + 1)
+    for row in rows:
+        collection = collections.setdefault(
+            row["collection_id"],
+            {"id": row["collection_id"], "title": row["collection__title"], "count": 0},
+        )
+        collection["count"] += row["count"]
+        prices[row["price_bucket"]] += row["count"]
+
+    edges = [None, *bounds, None]
+    return {
+        "collections": sorted(
+            collections.values(), key=lambda facet: (-facet["count"], facet["id"])
+        ),
+        "prices": [
+            {"min": edges[index], "max": edges[index + 1], "count": count}
+            for index, count in enumerate(prices)
+        ],
+    }
@@ -1,9 +1,102 @@
-from django_filters.rest_framework import FilterSet
+from django import forms
+from django_filters.rest_framework import (
+    BaseInFilter,
+    ChoiceFilter,
+    FilterSet,
+    NumberFilter,
+)
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
 
-from store.models import Product
+from store.models import DailyCollectionSales, DailyProductSales, Order, Product
+from store.search import get_search_backend, tokenize_query
+from tags.models import TaggedItem
+
+
+class RepeatedParamInput(forms.TextInput):
+    """Joins repeated `?name=` params with commas, so `?tag=1&tag=2` is `?tag=1,2`."""
+
+    def value_from_datadict(self, data, files, name):
+        if hasattr(data, "getlist") and name in data:
+            return ",".join(data.getlist(name))
+        return super().value_from_datadict(data, files, name)
+
+
+class IdInFilter(BaseInFilter, NumberFilter):
+    field_class = forms.IntegerField
 
 
 class ProductFilter(FilterSet):
+    # `?tag=1,2` or `?tag=1&tag=2` keeps products with either tag, add
+    # `&tag_mode=and` for both.
+    tag = IdInFilter(method="filter_tag", widget=RepeatedParamInput)
+    tag_mode = ChoiceFilter(
+        choices=[("or", "Any tag"), ("and", "All tags")], method="filter_tag_mode"
+    )
+
     class Meta:
         model = Product
-        fields = {"collection_id": ["exact"], "unit_price": ["gt", "lt"]}
+        fields = {
+            "collection_id": ["exact"],
+            "unit_price": ["gt", "lt"],
+            "effective_price": ["gt", "lt"],
+        }
+
+    def filter_tag(self, queryset, name, value):
+        match_all = self.form.cleaned_data.get("tag_mode") == "and"
+        return queryset.filter(
+            id__in=TaggedItem.objects.object_ids(Product, value, match_all)
+        )
+
+    def filter_tag_mode(self, queryset, name, value):
+        # Read by filter_tag.
+        return queryset
+
+
+class OrderFilter(FilterSet):
+    class Meta:
+        model = Order
+        fields = {
+            "customer_id": ["exact"],
+            "payment_status": ["exact"],
+            "placed_at": ["gte", "lt"],
+        }
+
+
+class ProductSalesFilter(FilterSet):
+    class Meta:
+        model = DailyProductSales
+        fields = {
+            "day": ["gte", "lte"],
+            "payment_status": ["exact"],
+            "product_id": ["exact"],
+        }
+
+
+class CollectionSalesFilter(FilterSet):
+    class Meta:
+        model = DailyCollectionSales
+        fields = {
+            "day": ["gte", "lte"],
+            "payment_status": ["exact"],
+            "collection_id": ["exact"],
+        }
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Runs `?search=` through the configured search backend instead of
+    `icontains` lookups, ordering by relevance unless `?ordering=` is given.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        if not tokenize_query(query):
+            return queryset.none()
+
+        queryset = get_search_backend().search(queryset, query)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by("-relevance", "id")
+        return queryset
@@ -0,0 +1,99 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+from store.cache import bump_product_versions_on_commit
+from store.models import Product, ProductImage
+
+DEFAULT_VARIANTS = {
+    "thumb": {"size": 200, "format": "JPEG"},
+    "medium": {"size": 800, "format": "JPEG"},
+    "webp": {"size": 800, "format": "WEBP"},
+}
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+def get_variant_specs():
+    return getattr(settings, "STORE_IMAGE_VARIANTS", DEFAULT_VARIANTS)
+
+
+def touch_product(product_id):
+    """
+    Marks a product as changed after one of its images changed, for the
+    conditional GET validators and the cached catalog responses.
+    """
+    collection_id = (
+        Product.objects.filter(pk=product_id)
+        .values_list("collection_id", flat=True)
+        .first()
+    )
+    Product.objects.filter(pk=product_id).update(last_update=Now())
+    bump_product_versions_on_commit(product_id, collection_id)
+
+
+def render_variant(original, size, image_format):
+    variant = original.copy()
+    variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if image_format == "JPEG" and variant.mode != "RGB":
+        variant = variant.convert("RGB")
+    buffer = BytesIO()
+    variant.save(buffer, image_format, quality=85, optimize=True)
+    return variant.size, buffer.getvalue()
+
+
+def generate_variants(image):
+    """
+    Renders every configured variant of a `ProductImage`, stores them next
+    to the original and records their names and the dimensions. Returns
+    False if the image was replaced or deleted while it was being read.
+    """
+    storage = image.image.storage
+    name = image.image.name
+    with storage.open(name, "rb") as file:
+        original = Image.open(file)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    directory = posixpath.join(posixpath.dirname(name), "variants")
+    variants = {}
+    for variant_name, spec in get_variant_specs().items():
+        (width, height), content = render_variant(
+            original, spec["size"], spec["format"]
+        )
+        path = posixpath.join(
+            directory, f"{stem}_{variant_name}.{EXTENSIONS[spec['format']]}"
+        )
+        variants[variant_name] = {
+            "name": storage.save(path, ContentFile(content)),
+            "width": width,
+            "height": height,
+        }
+
+    updated = ProductImage.objects.filter(pk=image.pk, image=name).update(
+        width=original.width, height=original.height, variants=variants
+    )
+    # Leave no files behind: the old variants once replaced, or the new ones
+    # if the upload changed underneath.
+    stale = image.variants.values() if updated else variants.values()
+    kept = {variant["name"] for variant in variants.values()} if updated else set()
+    for variant in stale:
+        if variant["name"] not in kept:
+            storage.delete(variant["name"])
+    if updated:
+        touch_product(image.product_id)
+    return bool(updated)
+
+
+def delete_image_files(image):
+    """Deletes the stored original of a `ProductImage` and all its variants."""
+    storage = image.image.storage
+    names = [variant["name"] for variant in image.variants.values()]
+    if image.image:
+        names.append(image.image.name)
+    for name in names:
+        storage.delete(name)
@@ -0,0 +1,55 @@
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from store.cache import bump_product_versions_on_commit
+from store.models import Product
+
+
+def reserve_inventory(quantities):
+    """
+    Reserves stock for `{product_id: quantity}` and returns the locked product
+    rows keyed by id, together with per-line errors keyed by product id.
+
+    Rows are locked in ascending id order so concurrent checkouts of the same
+    products queue up instead of deadlocking, then decremented with a single
+    conditional UPDATE. Nothing is decremented if any line fails. Must be
+    called inside a transaction.
+    """
+    product_ids = sorted(quantities)
+    products = {
+        product["id"]: product
+        for product in Product.objects.select_for_update()
+        .filter(id__in=product_ids)
+        .order_by("id")
+        .values("id", "title", "unit_price", "inventory", "collection_id")
+    }
+
+    errors = {}
+    for product_id in product_ids:
+        product = products.get(product_id)
+        available = max(product["inventory"], 0) if product else 0
+        if available < quantities[product_id]:
+            errors[product_id] = [
+                f"Only {available} left in stock, "
+                f"{quantities[product_id]} requested."
+            ]
+    if errors:
+        return products, errors
+
+    requested = Case(
+        *[
+            When(id=product_id, then=Value(quantity))
+            for product_id, quantity in quantities.items()
+        ],
+        output_field=IntegerField(),
+    )
+    updated = Product.objects.filter(
+        id__in=product_ids, inventory__gte=requested
+    ).update(inventory=F("inventory") - requested, last_update=Now())
+    if updated != len(product_ids):
+        # Only possible if something bypassed the row locks above.
+        raise RuntimeError("Inventory changed while it was locked")
+
+    for product in products.values():
+        bump_product_versions_on_commit(product["id"], product["collection_id"])
+    return products, errors
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from store.models import CartItem, Product
+
+
+class Latency:
+    """Sleeps before every statement, standing in for a remote database."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync read endpoints served through WSGI by a fixed thread "
+        "pool with their async versions served through ASGI by one event loop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--threads", type=int, default=4, help="WSGI worker threads"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="In-flight ASGI requests"
+        )
+        parser.add_argument(
+            "--latency", type=float, default=50.0, help="Milliseconds per query"
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        latency = Latency(options["latency"] / 1000)
+        try:
+            # Measure the views, not the response cache or the SQL sampler.
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                    }
+                },
+                SQL_INSTRUMENTATION={"SAMPLE_RATE": 0},
+            ):
+                endpoints = self.seed()
+                connection_created.connect(latency.install)
+                for alias in connections:
+                    latency.install(connections[alias])
+                self.benchmark(endpoints, options)
+        finally:
+            connection_created.disconnect(latency.install)
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self):
+        call_command(
+            "seed_store",
+            products=200,
+            customers=1,
+            orders=0,
+            carts=10,
+            seed=42,
+            stdout=StringIO(),
+        )
+        product = Product.objects.order_by("id").first().id
+        cart = CartItem.objects.order_by("cart_id").first().cart_id
+        return [
+            ("products-list", "/store/products/?page=2"),
+            ("products-detail", f"/store/products/{product}/"),
+            ("collections-list", "/store/collections/"),
+            ("carts-detail", f"/store/carts/{cart}/"),
+        ]
+
+    def benchmark(self, endpoints, options):
+        count = options["requests"]
+        self.stdout.write(
+            f"{count} requests per run, {options['latency']:g} ms per query, "
+            f"WSGI with {options['threads']} threads, "
+            f"ASGI with {options['concurrency']} in flight"
+        )
+        self.stdout.write(
+            f"{'endpoint':<20}{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        for name, url in endpoints:
+            async_url = url.replace("/store/", "/store/async/", 1)
+            sync_body = self.wsgi_get(url)
+            async_body = asyncio.run(self.asgi_get(ASGIHandler(), async_url))
+            # Pagination links point back at the endpoint that served them.
+            async_body = async_body.replace(b"/store/async/", b"/store/")
+            if json.loads(sync_body) != json.loads(async_body):
+                raise CommandError(f"{name}: the async response differs.")
+
+            for server, run in [
+                ("wsgi", lambda: self.run_wsgi(url, count, options["threads"])),
+                (
+                    "asgi",
+                    lambda: asyncio.run(
+                        self.run_asgi(async_url, count, options["concurrency"])
+                    ),
+                ),
+            ]:
+                elapsed, latencies = run()
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:<20}{server:<8}{count / elapsed:>10.1f}"
+                    f"{statistics.median(latencies) * 1000:>10.1f}"
+                    f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>10.1f}"
+                )
+        self.stdout.write(self.style.SUCCESS("Responses are identical."))
+
+    def wsgi_get(self, url):
+        response = Client().get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}")
+        return response.content
+
+    def run_wsgi(self, url, count, threads):
+        def timed(_):
+            started = time.perf_counter()
+            self.wsgi_get(url)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(timed, range(count)))
+        return time.perf_counter() - started, latencies
+
+    async def asgi_get(self, application, url):
+        parts = urlsplit(url)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        received = asyncio.Event()
+        messages = []
+
+        async def receive():
+            if not received.is_set():
+                received.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The client stays connected until the response is sent.
+            await asyncio.Future()
+
+        async def send(message):
+            messages.append(message)
+
+        await application(scope, receive, send)
+        status = messages[0]["status"]
+        if status != 200:
+            raise CommandError(f"GET {url} returned {status}")
+        return b"".join(
+            message.get("body", b"")
+            for message in messages
+            if message["type"] == "http.response.body"
+        )
+
+    async def run_asgi(self, url, count, concurrency):
+        application = ASGIHandler()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with semaphore:
+                started = time.perf_counter()
+                await self.asgi_get(application, url)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(timed() for _ in range(count)))
+        return time.perf_counter() - started, list(latencies)
@@ -0,0 +1,156 @@
+import statistics
+import threading
+import time
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+
+from store.models import (
+    Cart,
+    CartItem,
+    Collection,
+    Customer,
+    Order,
+    OrderItems,
+    Product,
+)
+from store.serializers import CreateOrderSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure checkout throughput with N concurrent buyers of the same hot products"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=20)
+        parser.add_argument("--products", type=int, default=3)
+        parser.add_argument("--quantity", type=int, default=1)
+        parser.add_argument(
+            "--inventory",
+            type=int,
+            default=None,
+            help="Stock per hot product (defaults to enough for 80%% of the buyers)",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the generated data"
+        )
+
+    def handle(self, *args, **options):
+        buyers = options["buyers"]
+        quantity = options["quantity"]
+        inventory = options["inventory"]
+        if inventory is None:
+            inventory = int(buyers * quantity * 0.8)
+
+        run_id = uuid4().hex[:8]
+        collection = Collection.objects.create(title=f"benchmark-{run_id}")
+        products = [
+            Product.objects.create(
+                title=f"Hot product {index} ({run_id})",
+                unit_price=10,
+                inventory=inventory,
+                collection=collection,
+            )
+            for index in range(options["products"])
+        ]
+        User.objects.bulk_create(
+            [User(username=f"buyer-{run_id}-{index}") for index in range(buyers)]
+        )
+        users = list(User.objects.filter(username__startswith=f"buyer-{run_id}-"))
+        Customer.objects.bulk_create(
+            [Customer(user=user) for user in users], ignore_conflicts=True
+        )
+        customer_ids = dict(
+            Customer.objects.filter(user__in=users).values_list("user_id", "id")
+        )
+        carts = Cart.objects.bulk_create([Cart() for _ in users])
+        for cart in carts:
+            CartItem.objects.add_items(
+                cart.id, {product.id: quantity for product in products}
+            )
+
+        latencies = []
+        outcomes = {"ordered": 0, "sold_out": 0, "errors": 0}
+        lock = threading.Lock()
+        start = threading.Barrier(buyers)
+
+        def checkout(user, cart):
+            start.wait()
+            began = time.perf_counter()
+            try:
+                serializer = CreateOrderSerializer(
+                    data={"cart_id": cart.id},
+                    context={"customer_id": customer_ids[user.id]},
+                )
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                outcome = "ordered"
+            except ValidationError:
+                outcome = "sold_out"
+            except Exception as error:
+                self.stderr.write(f"{user.username}: {error}")
+                outcome = "errors"
+            finally:
+                connection.close()
+            with lock:
+                latencies.append(time.perf_counter() - began)
+                outcomes[outcome] += 1
+
+        threads = [
+            threading.Thread(target=checkout, args=(user, cart))
+            for user, cart in zip(users, carts)
+        ]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        remaining = list(
+            Product.objects.filter(collection=collection).values_list(
+                "inventory", flat=True
+            )
+        )
+        sold = sum(inventory - left for left in remaining)
+        ordered_units = outcomes["ordered"] * quantity * len(products)
+
+        latencies.sort()
+        self.stdout.write(
+            f"{buyers} buyers, {len(products)} hot products, "
+            f"{inventory} units each, {quantity} per line"
+        )
+        self.stdout.write(
+            f"ordered: {outcomes['ordered']}, sold out: {outcomes['sold_out']}, "
+            f"errors: {outcomes['errors']}"
+        )
+        self.stdout.write(
+            f"throughput: {outcomes['ordered'] / elapsed:.1f} orders/s "
+            f"over {elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"latency p50: {statistics.median(latencies) * 1000:.1f}ms, "
+            f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms, "
+            f"max: {latencies[-1] * 1000:.1f}ms"
+        )
+        if sold == ordered_units and min(remaining, default=0) >= 0:
+            self.stdout.write(self.style.SUCCESS("No overselling detected."))
+        else:
+            self.stdout.write(
+                self.style.ERROR(f"Sold {sold} units but ordered {ordered_units}.")
+            )
+
+        if not options["keep"]:
+            orders = Order.objects.filter(customer__user__in=users)
+            OrderItems.objects.filter(order__in=orders).delete()
+            orders.delete()
+            Cart.objects.filter(pk__in=[cart.id for cart in carts]).delete()
+            Product.objects.filter(collection=collection).delete()
+            collection.delete()
+            User.objects.filter(pk__in=[user.id for user in users]).delete()
@@ -0,0 +1,432 @@
+import json
+import statistics
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from core.serializers import TokenObtainPairSerializer
+from store.cache import get_cache
+from store.models import (
+    Cart,
+    CartItem,
+    Collection,
+    Customer,
+    Order,
+    Product,
+    ProductImage,
+    Review,
+)
+
+User = get_user_model()
+
+BASELINE_PATH = Path(__file__).resolve().parents[2] / "benchmark_baseline.json"
+
+# `url` and `data` may be callables, called before every request so that
+# writes such as deletes get a fresh row each time. `data` is sent as JSON
+# unless a `content_type` is given.
+Endpoint = namedtuple(
+    "Endpoint",
+    ["name", "method", "url", "user", "data", "content_type"],
+    defaults=[None, None, None],
+)
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQL query count, DB time and wall time of every store endpoint "
+        "against a seeded throwaway database and fail if a query count rose "
+        "above the baseline. Times are machine dependent, they are only shown"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help=f"Write the results to {BASELINE_PATH.name}",
+        )
+        parser.add_argument("--baseline", default=str(BASELINE_PATH))
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = self.benchmark(options["repeat"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        baseline_path = Path(options["baseline"])
+        if options["update_baseline"]:
+            queries = {name: result["queries"] for name, result in results.items()}
+            baseline_path.write_text(json.dumps(queries, indent=2) + "\n")
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline written to {baseline_path}")
+            )
+            return
+
+        baseline = (
+            json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        )
+        regressions = self.report(results, baseline)
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} endpoints regressed: {', '.join(regressions)}"
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def seed(self):
+        call_command(
+            "seed_store",
+            products=200,
+            customers=20,
+            orders=200,
+            carts=10,
+            seed=42,
+            stdout=StringIO(),
+        )
+        staff = User.objects.create_superuser("benchmark-staff")
+        customer = Customer.objects.select_related("user").order_by("id").first()
+        product = Product.objects.order_by("id").first()
+        Review.objects.bulk_create(
+            [
+                Review(product=product, name=f"Reviewer {index}", description="Good")
+                for index in range(10)
+            ]
+        )
+        cart = CartItem.objects.order_by("cart_id").first().cart
+        order = Order.objects.filter(customer=customer).order_by("id").first()
+        return {
+            "staff": staff,
+            "user": customer.user,
+            "customer": customer,
+            "product": product,
+            "collection": Collection.objects.order_by("id").first(),
+            "cart": cart,
+            "cart_item": cart.items.order_by("id").first(),
+            "review": Review.objects.filter(product=product).order_by("id").first(),
+            "order": order,
+            "search": product.title.split()[0],
+        }
+
+    def get_endpoints(self, fixtures):
+        product = fixtures["product"].id
+        collection = fixtures["collection"].id
+        cart = fixtures["cart"].id
+        review = fixtures["review"].id
+        order = fixtures["order"].id
+        products = list(
+            Product.objects.order_by("id").values(
+                "id", "title", "slug", "unit_price", "inventory", "collection_id"
+            )[:20]
+        )
+        return [
+            Endpoint("products-list", "get", "/store/products/"),
+            Endpoint(
+                "products-list-keyset",
+                "get",
+                "/store/products/?pagination=keyset&ordering=-unit_price",
+            ),
+            Endpoint(
+                "products-search",
+                "get",
+                f"/store/products/?search={fixtures['search']}",
+            ),
+            Endpoint("products-facets", "get", "/store/products/facets/"),
+            Endpoint("products-tags", "get", "/store/products/tags/"),
+            Endpoint("products-detail", "get", f"/store/products/{product}/"),
+            Endpoint(
+                "products-update",
+                "patch",
+                f"/store/products/{product}/",
+                "staff",
+                {"inventory": 50},
+            ),
+            Endpoint(
+                "products-delete",
+                "delete",
+                lambda: f"/store/products/{self.new_product(collection)}/",
+                "staff",
+            ),
+            Endpoint(
+                "product-reviews-list", "get", f"/store/products/{product}/reviews/"
+            ),
+            Endpoint(
+                "product-reviews-update",
+                "patch",
+                f"/store/products/{product}/reviews/{review}/",
+                None,
+                {"description": "Great"},
+            ),
+            Endpoint(
+                "product-reviews-delete",
+                "delete",
+                lambda: f"/store/products/{product}/reviews/"
+                f"{Review.objects.create(product_id=product, name='R').id}/",
+            ),
+            Endpoint(
+                "product-images-list", "get", f"/store/products/{product}/images/"
+            ),
+            Endpoint(
+                "product-images-delete",
+                "delete",
+                lambda: f"/store/products/{product}/images/"
+                f"{self.new_image(product)}/",
+                "staff",
+            ),
+            Endpoint("collections-list", "get", "/store/collections/"),
+            Endpoint("collections-detail", "get", f"/store/collections/{collection}/"),
+            Endpoint(
+                "collections-update",
+                "patch",
+                f"/store/collections/{collection}/",
+                "staff",
+                {"title": "Renamed"},
+            ),
+            Endpoint(
+                "collections-delete",
+                "delete",
+                lambda: f"/store/collections/{Collection.objects.create(title='C').id}/",
+                "staff",
+            ),
+            Endpoint("carts-detail", "get", f"/store/carts/{cart}/"),
+            Endpoint(
+                "carts-delete",
+                "delete",
+                lambda: f"/store/carts/{self.new_cart(product)}/",
+            ),
+            Endpoint("cart-items-list", "get", f"/store/carts/{cart}/items/"),
+            Endpoint(
+                "cart-items-create",
+                "post",
+                f"/store/carts/{cart}/items/",
+                None,
+                {"product_id": product, "quantity": 1},
+            ),
+            Endpoint(
+                "cart-items-bulk",
+                "post",
+                f"/store/carts/{cart}/items/bulk/",
+                None,
+                {
+                    "items": [
+                        {"product_id": row["id"], "quantity": 1} for row in products
+                    ]
+                },
+            ),
+            Endpoint(
+                "cart-items-update",
+                "patch",
+                f"/store/carts/{cart}/items/{fixtures['cart_item'].id}/",
+                None,
+                {"quantity": 2},
+            ),
+            Endpoint(
+                "cart-items-delete",
+                "delete",
+                lambda: self.new_cart_item_url(product),
+            ),
+            Endpoint("customers-list", "get", "/store/customers/", "staff"),
+            Endpoint("customers-me", "get", "/store/customers/me/", "user"),
+            Endpoint(
+                "customers-update",
+                "patch",
+                f"/store/customers/{fixtures['customer'].id}/",
+                "staff",
+                {"phone": "5550100"},
+            ),
+            Endpoint(
+                "customers-delete",
+                "delete",
+                lambda: f"/store/customers/{self.new_customer()}/",
+                "staff",
+            ),
+            Endpoint("orders-list", "get", "/store/orders/", "user"),
+            Endpoint("orders-list-staff", "get", "/store/orders/", "staff"),
+            Endpoint("orders-detail", "get", f"/store/orders/{order}/", "user"),
+            Endpoint(
+                "orders-create",
+                "post",
+                "/store/orders/",
+                "user",
+                lambda: {"cart_id": str(self.new_cart(product))},
+            ),
+            Endpoint(
+                "orders-update",
+                "patch",
+                f"/store/orders/{order}/",
+                "staff",
+                self.toggle_payment_status(order),
+            ),
+            Endpoint(
+                "orders-delete",
+                "delete",
+                lambda: f"/store/orders/"
+                f"{Order.objects.create(customer=fixtures['customer']).id}/",
+                "staff",
+            ),
+            Endpoint(
+                "reports-product-sales",
+                "get",
+                "/store/reports/product-sales/",
+                "staff",
+            ),
+            Endpoint(
+                "reports-collection-sales-by-collection",
+                "get",
+                "/store/reports/collection-sales/?group_by=collection",
+                "staff",
+            ),
+            Endpoint(
+                "catalog-export", "get", "/store/catalog/products/export/", "staff"
+            ),
+            Endpoint(
+                "catalog-import",
+                "post",
+                "/store/catalog/products/import/",
+                "staff",
+                "".join(json.dumps(row, default=str) + "\n" for row in products),
+                "application/x-ndjson",
+            ),
+            Endpoint("async-products-list", "get", "/store/async/products/"),
+            Endpoint(
+                "async-products-detail", "get", f"/store/async/products/{product}/"
+            ),
+            Endpoint("async-collections-list", "get", "/store/async/collections/"),
+            Endpoint("async-carts-detail", "get", f"/store/async/carts/{cart}/"),
+        ]
+
+    def new_product(self, collection_id):
+        return Product.objects.create(
+            title="Benchmark",
+            slug="benchmark",
+            unit_price=1,
+            inventory=1,
+            collection_id=collection_id,
+        ).id
+
+    def new_image(self, product_id):
+        # bulk_create skips rendering variants of a file that does not exist.
+        return ProductImage.objects.bulk_create(
+            [ProductImage(product_id=product_id, image="store/images/benchmark.jpg")]
+        )[0].id
+
+    def new_cart(self, product_id):
+        cart = Cart.objects.create()
+        CartItem.objects.add_items(cart.id, {product_id: 1})
+        return cart.id
+
+    def new_cart_item_url(self, product_id):
+        cart_id = self.new_cart(product_id)
+        item = CartItem.objects.get(cart_id=cart_id)
+        return f"/store/carts/{cart_id}/items/{item.id}/"
+
+    def new_customer(self):
+        user = User.objects.create_user(f"benchmark-{User.objects.count()}")
+        return user.customer.id
+
+    def toggle_payment_status(self, order_id):
+        # Every request changes the status, so each one publishes its event.
+        statuses = [Order.PAYMENT_COMPLETE, Order.PAYMENT_FAILED]
+
+        def data():
+            statuses.reverse()
+            return {"payment_status": statuses[0]}
+
+        return data
+
+    def benchmark(self, repeat):
+        fixtures = self.seed()
+        results = {}
+        for endpoint in self.get_endpoints(fixtures):
+            client = APIClient()
+            if endpoint.user is not None:
+                # Real tokens, so authentication queries are measured too.
+                token = TokenObtainPairSerializer.get_token(fixtures[endpoint.user])
+                client.credentials(HTTP_AUTHORIZATION=f"JWT {token.access_token}")
+            if endpoint.content_type:
+                options = {"content_type": endpoint.content_type}
+            else:
+                options = {"format": "json"}
+
+            query_counts, db_times, wall_times = [], [], []
+            for _ in range(repeat):
+                url = endpoint.url() if callable(endpoint.url) else endpoint.url
+                data = endpoint.data() if callable(endpoint.data) else endpoint.data
+                # Measure the uncached path, the cache only hides regressions.
+                get_cache().clear()
+                timer = QueryTimer()
+                # Reads may be routed to a replica, count every connection.
+                with ExitStack() as stack:
+                    for alias in connections:
+                        stack.enter_context(connections[alias].execute_wrapper(timer))
+                    started = time.perf_counter()
+                    response = getattr(client, endpoint.method)(url, data, **options)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    wall_times.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f"{endpoint.name}: {endpoint.method.upper()} {url} returned "
+                        f"{response.status_code}: {response.content[:200]!r}"
+                    )
+                query_counts.append(timer.count)
+                db_times.append(timer.seconds)
+
+            results[endpoint.name] = {
+                "queries": max(query_counts),
+                "db_ms": round(statistics.median(db_times) * 1000, 2),
+                "wall_ms": round(statistics.median(wall_times) * 1000, 2),
+            }
+        return results
+
+    def report(self, results, baseline):
+        regressions = []
+        self.stdout.write(
+            f"{'endpoint':<40}{'queries':>12}{'db ms':>10}{'wall ms':>10}"
+        )
+        for name, result in results.items():
+            expected = baseline.get(name)
+            queries = f"{result['queries']}"
+            if expected is not None:
+                queries += f" ({expected})"
+            line = (
+                f"{name:<40}{queries:>12}"
+                f"{result['db_ms']:>10}{result['wall_ms']:>10}"
+            )
+            if expected is None:
+                self.stdout.write(self.style.WARNING(f"{line}  no baseline"))
+            elif result["queries"] > expected:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{line}  queries"))
+            else:
+                self.stdout.write(line)
+        return regressions
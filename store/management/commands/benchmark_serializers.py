@@ -0,0 +1,124 @@
+import statistics
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from store.models import Product, ProductImage
+from store.serializers import (
+    ProductListSerializer,
+    ProductSerializer,
+    group_image_rows,
+    serialize_products,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-row cost of ProductSerializer and the fast values() "
+        "path used for product list pages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--images", type=int, default=2, help="Per product")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.seed(options["products"], options["images"])
+            self.benchmark(options["repeat"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, products, images):
+        call_command(
+            "seed_store",
+            products=products,
+            customers=0,
+            orders=0,
+            carts=0,
+            stdout=StringIO(),
+        )
+        ProductImage.objects.bulk_create(
+            [
+                ProductImage(
+                    product_id=product_id,
+                    image=f"store/images/{product_id}-{index}.jpg",
+                )
+                for product_id in Product.objects.values_list("id", flat=True)
+                for index in range(images)
+            ],
+            batch_size=5000,
+        )
+
+    def benchmark(self, repeat):
+        request = APIRequestFactory().get("/store/products/")
+        context = {"request": request}
+
+        def instances():
+            return list(Product.objects.prefetch_related("images").order_by("id"))
+
+        def rows():
+            return list(
+                Product.objects.order_by("id").values(
+                    *ProductListSerializer.value_fields
+                )
+            )
+
+        products = instances()
+        product_rows = rows()
+        images = group_image_rows([row["id"] for row in product_rows])
+
+        serializer_data = ProductSerializer(products, many=True, context=context).data
+        fast_data = serialize_products(product_rows, images, request)
+        if JSONRenderer().render(serializer_data) != JSONRenderer().render(fast_data):
+            raise CommandError("The fast path output differs from ProductSerializer.")
+
+        cases = [
+            (
+                "serializer",
+                lambda: ProductSerializer(products, many=True, context=context).data,
+            ),
+            ("fast", lambda: serialize_products(product_rows, images, request)),
+            (
+                "serializer+db",
+                lambda: ProductSerializer(instances(), many=True, context=context).data,
+            ),
+            (
+                "fast+db",
+                lambda: ProductListSerializer(
+                    Product.objects.order_by("id").values(
+                        *ProductListSerializer.value_fields
+                    ),
+                    context=context,
+                ).data,
+            ),
+        ]
+        count = len(products)
+        self.stdout.write(f"{count} products, median of {repeat} runs")
+        self.stdout.write(f"{'path':<16}{'total ms':>12}{'per row us':>14}")
+        for name, func in cases:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            self.stdout.write(
+                f"{name:<16}{median * 1000:>12.1f}"
+                f"{median / max(count, 1) * 1e6:>14.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("Output is identical."))
@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from store.catalog import CATALOGS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream collections, promotions or products out as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(CATALOGS))
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write (defaults to stdout)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lines = export_lines(options["kind"], options["format"], options["chunk_size"])
+        if options["output"] is None:
+            sys.stdout.writelines(lines)
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as output:
+            output.writelines(lines)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from store.models import ProductImage
+from store.tasks import generate_image_variants
+
+
+class Command(BaseCommand):
+    help = "Queue variant generation for product images that have none yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Regenerate every image's variants"
+        )
+        parser.add_argument(
+            "--sync", action="store_true", help="Render here instead of in Celery"
+        )
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.order_by("id")
+        if not options["all"]:
+            images = images.filter(variants={})
+        count = 0
+        for image_id in images.values_list("id", flat=True).iterator():
+            if options["sync"]:
+                generate_image_variants(image_id)
+            else:
+                generate_image_variants.delay(image_id)
+            count += 1
+        verb = "Generated" if options["sync"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{verb} variants for {count} images."))
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.catalog import CATALOGS, FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert collections, promotions or products from a CSV or NDJSON file "
+        "in chunked bulk writes, reporting the rows that failed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(CATALOGS))
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=list(FORMATS),
+            help="Defaults to the file extension (.csv, .ndjson or .jsonl)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--max-errors", type=int, default=100)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or (
+            "csv" if path.suffix == ".csv" else "ndjson"
+        )
+
+        def progress(summary):
+            self.stdout.write(
+                f"   created: {summary['created']}, updated: {summary['updated']}, "
+                f"failed: {summary['failed']}"
+            )
+
+        with path.open("rb") as file:
+            summary = import_rows(
+                options["kind"],
+                read_rows(options["kind"], file, file_format),
+                chunk_size=options["chunk_size"],
+                max_errors=options["max_errors"],
+                progress=progress,
+            )
+
+        for error in summary["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        message = (
+            f"Created {summary['created']}, updated {summary['updated']}, "
+            f"failed {summary['failed']} {options['kind']}."
+        )
+        if summary["failed"]:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
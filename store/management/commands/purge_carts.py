@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.carts import count_abandoned_carts, get_cart_cutoff, purge_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned carts and their items in small chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ttl-days",
+            type=int,
+            default=None,
+            help="Delete carts older than this (defaults to STORE_CART_TTL_DAYS)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between chunks",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many carts would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = get_cart_cutoff(options["ttl_days"])
+        carts, items = count_abandoned_carts(cutoff)
+        self.stdout.write(
+            f"{carts} carts with {items} items were created before "
+            f"{cutoff:%Y-%m-%d %H:%M}."
+        )
+        if options["dry_run"] or not carts:
+            return
+
+        deleted_carts = deleted_items = 0
+        for chunk_carts, chunk_items in purge_abandoned_carts(
+            cutoff, options["chunk_size"]
+        ):
+            deleted_carts += chunk_carts
+            deleted_items += chunk_items
+            self.stdout.write(f"   carts: {deleted_carts}/{carts}")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted_carts} carts and {deleted_items} items."
+            )
+        )
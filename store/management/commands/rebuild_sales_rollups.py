@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from store.sales import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily product and collection sales rollups from the order "
+        "lines. Pause order event delivery while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=10000, help="Orders per GROUP BY"
+        )
+
+    def handle(self, *args, **options):
+        lines = rebuild_rollups(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {lines} order lines."))
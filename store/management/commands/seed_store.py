@@ -1,118 +1,412 @@
-from django.core.management.base import BaseCommand
-from django.db import IntegrityError
-from faker import Faker
+import multiprocessing
 import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from uuid import UUID
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.text import slugify
+from faker import Faker
+
+from store.cache import GENERATION_SCOPE, bump_versions
+from store.counters import recount_products
 from store.models import (
-    Product,
+    Address,
+    Cart,
+    CartItem,
     Collection,
-    Promotion,
     Customer,
+    DailyCollectionSales,
+    DailyProductSales,
     Order,
     OrderItems,
-    Cart,
-    CartItem,
+    OutboxEvent,
+    Product,
+    ProductImage,
+    ProductSearchTerm,
+    Promotion,
+    Review,
 )
+from store.pricing import recompute_effective_prices
+from store.sales import rebuild_rollups
+from store.search import get_search_backend
 
 User = get_user_model()
+ProductPromotion = Product.promotions.through
+
+MEMBERSHIPS = [
+    Customer.MEMBERSHIP_BRONZE,
+    Customer.MEMBERSHIP_SILVER,
+    Customer.MEMBERSHIP_GOLD,
+]
+
+
+def chunk_rng(seed, kind, index):
+    # Seeding per chunk (not per worker) keeps the data identical no matter
+    # how many workers generate it.
+    return random.Random(f"{seed}-{kind}-{index}")
+
+
+def chunk_faker(rng):
+    fake = Faker()
+    fake.seed_instance(rng.getrandbits(32))
+    return fake
+
+
+def product_price(product_id, seed):
+    # Derived from the id so orders can price their lines without reading
+    # the product table back.
+    return Decimal(1000 + (product_id * 2654435761 + seed) % 49001) / 100
+
+
+def seed_products(options, index, start, count):
+    seed = options["seed"]
+    rng = chunk_rng(seed, "products", index)
+    fake = chunk_faker(rng)
+    # Faker is the bottleneck at millions of rows, so each chunk draws from
+    # a small pool of generated words and sentences.
+    words = [fake.word() for _ in range(200)]
+    sentences = [fake.sentence() for _ in range(200)]
+    products = []
+    promotions = []
+    for product_id in range(start, start + count):
+        title = " ".join(rng.sample(words, rng.randint(1, 3))).capitalize()
+        products.append(
+            Product(
+                id=product_id,
+                title=title,
+                slug=f"{slugify(title)}-{product_id}",
+                description=" ".join(rng.sample(sentences, 3))[:200],
+                unit_price=product_price(product_id, seed),
+                inventory=rng.randint(0, 100),
+                collection_id=rng.randint(1, options["collections"]),
+            )
+        )
+        promotion_count = rng.randint(0, min(2, options["promotions"]))
+        promotions += [
+            ProductPromotion(product_id=product_id, promotion_id=promotion_id)
+            for promotion_id in rng.sample(
+                range(1, options["promotions"] + 1), promotion_count
+            )
+        ]
+
+    with transaction.atomic():
+        Product.objects.bulk_create(products)
+        ProductPromotion.objects.bulk_create(promotions)
+        recompute_effective_prices(range(start, start + count))
+        get_search_backend().index(products)
+    return count
+
+
+def seed_customers(options, index, start, count):
+    rng = chunk_rng(options["seed"], "customers", index)
+    fake = chunk_faker(rng)
+    user_offset = options["user_offset"]
+    users = []
+    customers = []
+    for customer_id in range(start, start + count):
+        first_name = fake.first_name()
+        last_name = fake.last_name()
+        users.append(
+            User(
+                id=user_offset + customer_id,
+                username=f"customer{customer_id}",
+                email=f"customer{customer_id}@example.com",
+                first_name=first_name,
+                last_name=last_name,
+                password=options["password"],
+            )
+        )
+        customers.append(
+            Customer(
+                id=customer_id,
+                user_id=user_offset + customer_id,
+                phone=fake.msisdn()[:13],
+                birth_date=fake.date_of_birth(minimum_age=18, maximum_age=80),
+                membership=rng.choice(MEMBERSHIPS),
+            )
+        )
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        Customer.objects.bulk_create(customers)
+    return count
+
+
+def seed_carts(options, index, start, count):
+    rng = chunk_rng(options["seed"], "carts", index)
+    carts = []
+    items = []
+    for _ in range(start, start + count):
+        cart = Cart(id=UUID(int=rng.getrandbits(128), version=4))
+        carts.append(cart)
+        items += [
+            CartItem(cart_id=cart.id, product_id=product_id, quantity=rng.randint(1, 5))
+            for product_id in rng.sample(
+                range(1, options["products"] + 1), min(3, options["products"])
+            )[: rng.randint(1, 3)]
+        ]
+
+    with transaction.atomic():
+        Cart.objects.bulk_create(carts)
+        CartItem.objects.bulk_create(items)
+    return count
+
+
+def insert_orders(orders):
+    # bulk_create would stamp the auto_now_add placed_at with the current
+    # time, so the backdated orders are inserted with plain SQL instead.
+    connection = connections[Order.objects.db]
+    qn = connection.ops.quote_name
+    fields = [
+        Order._meta.get_field(name)
+        for name in ["id", "customer", "placed_at", "payment_status"]
+    ]
+    sql = (
+        f"INSERT INTO {qn(Order._meta.db_table)} "
+        f"({', '.join(qn(field.column) for field in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))})"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                [
+                    field.get_db_prep_save(getattr(order, field.attname), connection)
+                    for field in fields
+                ]
+                for order in orders
+            ],
+        )
+
+
+def seed_orders(options, index, start, count):
+    seed = options["seed"]
+    rng = chunk_rng(seed, "orders", index)
+    now = timezone.now()
+    orders = []
+    items = []
+    for order_id in range(start, start + count):
+        orders.append(
+            Order(
+                id=order_id,
+                customer_id=rng.randint(1, options["customers"]),
+                placed_at=now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                payment_status=rng.choice(
+                    [Order.PAYMENT_COMPLETE] * 8
+                    + [Order.PAYMENT_PENDING, Order.PAYMENT_FAILED]
+                ),
+            )
+        )
+        items += [
+            OrderItems(
+                order_id=order_id,
+                product_id=product_id,
+                quantity=rng.randint(1, 5),
+                unit_price=product_price(product_id, seed),
+            )
+            for product_id in rng.sample(
+                range(1, options["products"] + 1), min(3, options["products"])
+            )[: rng.randint(1, 3)]
+        ]
+
+    with transaction.atomic():
+        insert_orders(orders)
+        OrderItems.objects.bulk_create(items)
+        # Products come from other chunks, so their collections are read back.
+        OrderItems.objects.filter(
+            order_id__gte=start, order_id__lt=start + count
+        ).update(
+            collection_id=Subquery(
+                Product.objects.filter(pk=OuterRef("product_id")).values(
+                    "collection_id"
+                )[:1]
+            )
+        )
+    return count
+
+
+def run_chunk(task):
+    func, options, index, start, count = task
+    return func(options, index, start, count)
 
 
 class Command(BaseCommand):
     help = "Seed the store with fake data using Faker"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--collections", type=int, default=5)
+        parser.add_argument("--promotions", type=int, default=5)
+        parser.add_argument("--products", type=int, default=15)
+        parser.add_argument("--customers", type=int, default=10)
+        parser.add_argument("--carts", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=10)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk_create batch and per worker task",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes generating chunks in parallel",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed, the same seed always generates the same data",
+        )
+
     def handle(self, *args, **options):
+        started = time.perf_counter()
+        if (
+            options["workers"] > 1
+            and connections[Product.objects.db].vendor == "sqlite"
+        ):
+            # SQLite allows one writer at a time, parallel chunks only fail
+            # with "database is locked".
+            self.stdout.write(
+                self.style.WARNING("SQLite has a single writer, using one worker.")
+            )
+            options["workers"] = 1
         fake = Faker()
-        fake.unique.clear()
+        fake.seed_instance(options["seed"])
+        rng = random.Random(options["seed"])
 
         self.stdout.write(self.style.WARNING("🧹 Clearing old data..."))
-        OrderItems.objects.all().delete()
-        Order.objects.all().delete()
-        CartItem.objects.all().delete()
-        Cart.objects.all().delete()
-        Product.objects.all().delete()
-        Promotion.objects.all().delete()
-        Collection.objects.all().delete()
-        Customer.objects.all().delete()
+        self.clear()
 
         self.stdout.write(self.style.SUCCESS("✅ Creating collections..."))
-        collections = [Collection.objects.create(title=fake.word()) for _ in range(5)]
+        Collection.objects.bulk_create(
+            [
+                Collection(id=collection_id, title=fake.word())
+                for collection_id in range(1, options["collections"] + 1)
+            ]
+        )
 
         self.stdout.write(self.style.SUCCESS("✅ Creating promotions..."))
-        promotions = [
-            Promotion.objects.create(
-                description=fake.sentence(), discount=random.uniform(0.05, 0.5)
-            )
-            for _ in range(5)
-        ]
-
-        self.stdout.write(self.style.SUCCESS("✅ Creating products..."))
-        products = []
-        for _ in range(15):
-            product = Product.objects.create(
-                title=fake.unique.word().capitalize(),
-                slug=fake.unique.slug(),
-                description=fake.text(max_nb_chars=200),
-                unit_price=random.uniform(10.0, 500.0),
-                inventory=random.randint(0, 100),
-                collection=random.choice(collections),
-            )
-            product.promotions.set(
-                random.sample(promotions, random.randint(0, len(promotions)))
-            )
-            products.append(product)
-
-        self.stdout.write(self.style.SUCCESS("✅ Creating customers..."))
-        customers = []
-        for _ in range(10):
-            try:
-                user = User.objects.create_user(
-                    username=fake.unique.user_name(),
-                    email=fake.unique.email(),
-                    password="1234",
-                )
-                cust = Customer.objects.create(
-                    user=user,
-                    phone=fake.msisdn()[:13],
-                    birth_date=fake.date_of_birth(minimum_age=18, maximum_age=80),
-                    membership=random.choice(
-                        [
-                            Customer.MEMBERSHIP_BRONZE,
-                            Customer.MEMBERSHIP_SILVER,
-                            Customer.MEMBERSHIP_GOLD,
-                        ]
-                    ),
-                )
-                customers.append(cust)
-            except IntegrityError:
-                continue
-
-        self.stdout.write(self.style.SUCCESS("✅ Creating carts and cart items..."))
-        carts = []
-        for _ in range(5):
-            cart = Cart.objects.create()
-            carts.append(cart)
-            for product in random.sample(products, random.randint(1, 3)):
-                CartItem.objects.create(
-                    cart=cart, product=product, quantity=random.randint(1, 5)
+        Promotion.objects.bulk_create(
+            [
+                Promotion(
+                    id=promotion_id,
+                    description=fake.sentence(),
+                    discount=rng.uniform(0.05, 0.5),
                 )
+                for promotion_id in range(1, options["promotions"] + 1)
+            ]
+        )
+
+        # Only plain values go to the workers, the full options hold streams.
+        config = {
+            name: options[name]
+            for name in [
+                "collections",
+                "promotions",
+                "products",
+                "customers",
+                "chunk_size",
+                "workers",
+                "seed",
+            ]
+        }
+        config["password"] = make_password("1234")
+        config["user_offset"] = (
+            User.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        )
+        self.run("products", seed_products, options["products"], config)
+        self.run("customers", seed_customers, options["customers"], config)
+        if not options["products"]:
+            options["carts"] = 0
+        self.run("carts and cart items", seed_carts, options["carts"], config)
+        if not (options["products"] and options["customers"]):
+            options["orders"] = 0
+        self.run("orders and order items", seed_orders, options["orders"], config)
 
-        self.stdout.write(self.style.SUCCESS("✅ Creating orders and order items..."))
-        orders = []
-        if customers and products:
-            for _ in range(10):
-                customer = random.choice(customers)
-                order = Order.objects.create(customer=customer)
-                orders.append(order)
-                for prod in random.sample(products, random.randint(1, 3)):
-                    OrderItems.objects.create(
-                        order=order,
-                        product=prod,
-                        quantity=random.randint(1, 5),
-                        unit_price=prod.unit_price,
-                    )
+        self.stdout.write(self.style.SUCCESS("✅ Rebuilding derived data..."))
+        recount_products()
+        rebuild_rollups(options["chunk_size"])
+        bump_versions(GENERATION_SCOPE)
 
         self.stdout.write(self.style.SUCCESS("🎉 Seeding completed successfully!"))
         self.stdout.write(
-            f"Created: {len(collections)} collections, {len(promotions)} promotions, "
-            f"{len(products)} products, {len(customers)} customers, {len(orders)} orders, {len(carts)} carts."
+            f"Created: {options['collections']} collections, "
+            f"{options['promotions']} promotions, {options['products']} products, "
+            f"{options['customers']} customers, {options['orders']} orders, "
+            f"{options['carts']} carts in {time.perf_counter() - started:.1f}s."
+        )
+
+    def run(self, label, func, total, options):
+        self.stdout.write(self.style.SUCCESS(f"✅ Creating {label}..."))
+        chunk_size = options["chunk_size"]
+        tasks = [
+            (func, options, index, start, min(chunk_size, total - start + 1))
+            for index, start in enumerate(range(1, total + 1, chunk_size))
+        ]
+
+        if options["workers"] > 1 and len(tasks) > 1:
+            # Forked workers must not share the parent's connections.
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(options["workers"]) as pool:
+                results = pool.imap_unordered(run_chunk, tasks)
+                self.report(label, results, total)
+        else:
+            self.report(label, map(run_chunk, tasks), total)
+
+    def report(self, label, results, total):
+        done = 0
+        for count in results:
+            done += count
+            if total > 10 * count:
+                self.stdout.write(f"   {label}: {done}/{total}")
+
+    def clear(self):
+        # A plain DELETE per table, children first to satisfy foreign keys,
+        # neither loads rows nor sends signals, which is the only way to wipe
+        # millions of rows quickly. Derived data is rebuilt after seeding.
+        Collection.objects.update(featured_product=None)
+        models = [
+            DailyProductSales,
+            DailyCollectionSales,
+            OrderItems,
+            Order,
+            OutboxEvent,
+            CartItem,
+            Cart,
+            Review,
+            ProductImage,
+            ProductSearchTerm,
+            ProductPromotion,
+            Product,
+            Promotion,
+            Collection,
+            Address,
+            Customer,
+        ]
+        connection = connections[Product.objects.db]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(
+                    f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}"
+                )
+
+        # Only the users created for seeded customers, never real accounts.
+        users = User.objects.filter(
+            is_staff=False,
+            is_superuser=False,
+            username__regex=r"^customer[0-9]+$",
+            email__regex=r"^customer[0-9]+@example\.com$",
         )
+        while True:
+            user_ids = list(users.values_list("id", flat=True)[:1000])
+            if not user_ids:
+                break
+            User.objects.filter(id__in=user_ids).delete()
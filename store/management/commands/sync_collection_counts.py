@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.counters import recount_products
+
+
+class Command(BaseCommand):
+    help = "Rebuild or verify the stored products_count of every collection"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report mismatches and exit with an error if any are found",
+        )
+
+    def handle(self, *args, **options):
+        verify = options["verify"]
+        mismatches = recount_products(fix=not verify)
+        for collection, stored, actual in mismatches:
+            self.stdout.write(
+                f"{collection} (#{collection.id}): stored {stored}, actual {actual}"
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All collection counts are correct."))
+        elif verify:
+            raise CommandError(f"{len(mismatches)} collection counts are wrong.")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Fixed {len(mismatches)} collection counts.")
+            )
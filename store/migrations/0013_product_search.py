@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:26
+
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of store.search.build_terms as of this migration.
+def build_terms(title, description):
+    weights = Counter()
+    for text, weight in [(title, 3), (description, 1)]:
+        for token in re.findall(r'\w+', (text or '').lower()):
+            if 1 < len(token) <= 64:
+                weights[token] += weight
+    return weights
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX store_product_fulltext '
+            'ON store_product (title, description)'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX store_product_fulltext ON store_product')
+
+
+def index_existing_products(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        return
+    Product = apps.get_model('store', 'Product')
+    ProductSearchTerm = apps.get_model('store', 'ProductSearchTerm')
+    products = Product.objects.only('id', 'title', 'description').order_by()
+    batch = []
+    for product in products.iterator(chunk_size=2000):
+        batch += [
+            ProductSearchTerm(product_id=product.id, term=term, weight=weight)
+            for term, weight in build_terms(product.title, product.description).items()
+        ]
+        if len(batch) >= 5000:
+            ProductSearchTerm.objects.bulk_create(batch)
+            batch = []
+    ProductSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'product', 'weight'], name='store_produ_term_773882_idx')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:27
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_products_count(apps, schema_editor):
+    Collection = apps.get_model('store', 'Collection')
+    Product = apps.get_model('store', 'Product')
+    counts = Product.objects.order_by().values_list('collection_id').annotate(count=Count('id'))
+    for collection_id, count in counts:
+        Collection.objects.filter(pk=collection_id).update(products_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_products_count, migrations.RunPython.noop),
+    ]
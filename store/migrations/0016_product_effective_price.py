@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:42
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Round
+
+
+def populate_effective_price(apps, schema_editor):
+    # Frozen copy of store.pricing.effective_price_expression as of this
+    # migration, built on the historical models.
+    Product = apps.get_model('store', 'Product')
+    ProductPromotion = Product.promotions.through
+    tax_rate = Decimal(str(getattr(settings, 'STORE_TAX_RATE', '0.10')))
+    best_discount = models.Subquery(
+        ProductPromotion.objects.filter(product_id=models.OuterRef('pk'))
+        .order_by()
+        .values('product_id')
+        .annotate(best=models.Max('promotion__discount'))
+        .values('best'),
+        output_field=models.FloatField(),
+    )
+    discount = Least(
+        Greatest(Coalesce(best_discount, models.Value(0.0)), models.Value(0.0)),
+        models.Value(1.0),
+    )
+    price = models.ExpressionWrapper(
+        models.F('unit_price')
+        * Cast(
+            models.Value(1.0) - discount,
+            models.DecimalField(max_digits=7, decimal_places=6),
+        )
+        * models.Value(1 + tax_rate),
+        output_field=models.DecimalField(max_digits=16, decimal_places=8),
+    )
+    Product.objects.update(
+        effective_price=Round(
+            price, 2, output_field=models.DecimalField(max_digits=8, decimal_places=2)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=8),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='store_produ_effecti_707a96_idx'),
+        ),
+        migrations.RunPython(populate_effective_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_collections(apps, schema_editor):
+    # Existing lines can only be credited to their product's collection today.
+    OrderItems = apps.get_model('store', 'OrderItems')
+    Product = apps.get_model('store', 'Product')
+    OrderItems.objects.update(
+        collection_id=models.Subquery(
+            Product.objects.filter(pk=models.OuterRef('product_id')).values(
+                'collection_id'
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0022_outboxevent_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitems',
+            name='collection',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.collection'),
+        ),
+        migrations.RunPython(snapshot_collections, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from uuid import uuid4
 from django.contrib import admin
 from django.conf import settings
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import ExpressionWrapper, F, Sum, Window
 
 from store.validators import validate_file_size
 
@@ -20,6 +21,8 @@ class Collection(models.Model):
     featured_product = models.ForeignKey(
         "Product", on_delete=models.SET_NULL, null=True, related_name="+"
     )
+    products_count = models.PositiveIntegerField(default=0, editable=False)
+    last_update = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -33,6 +36,10 @@ class Product(models.Model):
     slug = models.SlugField(null=True, blank=True)
     description = models.TextField(null=True, blank=True)
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    # Maintained by store.pricing: unit_price less the best promotion, plus tax.
+    effective_price = models.DecimalField(
+        max_digits=8, decimal_places=2, default=0, editable=False
+    )
     inventory = models.IntegerField()
     last_update = models.DateTimeField(auto_now=True)
     collection = models.ForeignKey(
@@ -43,8 +50,31 @@ class Product(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save receivers maintain denormalized data (collection counts,
+        # search terms), so they have to commit or roll back with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
     class Meta:
         ordering = ["title"]
+        indexes = [
+            models.Index(fields=["title", "id"]),
+            models.Index(fields=["unit_price", "id"]),
+            models.Index(fields=["effective_price", "id"]),
+            models.Index(fields=["last_update", "id"]),
+        ]
 
 
 class ProductImage(models.Model):
@@ -52,6 +82,19 @@ class ProductImage(models.Model):
         Product, on_delete=models.CASCADE, related_name="images"
     )
     image = models.ImageField(upload_to="store/images", validators=[validate_file_size])
+    # Filled in by the generate_image_variants task after the upload commits.
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+
+class ProductSearchTerm(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["term", "product", "weight"])]
 
 
 class Customer(models.Model):
@@ -103,6 +146,31 @@ class Order(models.Model):
     placed_at = models.DateTimeField(auto_now_add=True)
     customer = models.ForeignKey(Customer, on_delete=models.PROTECT)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save publishes payment status changes to the outbox, which has
+        # to commit or roll back with the row. No savepoint: orders are mostly
+        # saved inside checkout's transaction, which rolls back as a whole.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["placed_at", "id"]),
+            models.Index(fields=["customer", "placed_at", "id"]),
+            models.Index(fields=["payment_status", "placed_at", "id"]),
+        ]
+
 
 class OrderItems(models.Model):
     order = models.ForeignKey(Order, on_delete=models.PROTECT, related_name="items")
@@ -111,6 +179,20 @@ class OrderItems(models.Model):
     )
     quantity = models.PositiveBigIntegerField()
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    # The product's collection when the order was placed, which the sales
+    # rollups keep crediting however the product moves afterwards.
+    collection = models.ForeignKey(
+        Collection,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name="+",
+    )
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.collection_id is None and self.product_id:
+            self.collection_id = self.product.collection_id
+        super().save(*args, **kwargs)
 
 
 class Address(models.Model):
@@ -121,7 +203,85 @@ class Address(models.Model):
 
 class Cart(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class CartItemManager(models.Manager):
+    def add_items(self, cart_id, quantities):
+        """
+        Adds `{product_id: quantity}` to a cart in a single INSERT ... SELECT
+        that increments the quantity of lines already in the cart, so
+        concurrent adds never race on the (cart, product) unique key.
+
+        Unknown products (or an unknown cart) are skipped by the SELECT; the
+        resulting cart items are returned so callers can detect them.
+        """
+        if not quantities:
+            return []
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        product_table = qn(Product._meta.db_table)
+        cart_table = qn(Cart._meta.db_table)
+        db_cart_id = self.model._meta.get_field("cart").get_db_prep_value(
+            cart_id, connection
+        )
+
+        cases = " ".join(["WHEN %s THEN %s"] * len(quantities))
+        placeholders = ", ".join(["%s"] * len(quantities))
+        if connection.vendor == "mysql":
+            on_conflict = (
+                "ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)"
+            )
+        else:
+            on_conflict = (
+                "ON CONFLICT (cart_id, product_id) "
+                f"DO UPDATE SET quantity = {table}.quantity + excluded.quantity"
+            )
+        sql = (
+            f"INSERT INTO {table} (cart_id, product_id, quantity) "
+            f"SELECT %s, p.id, CASE p.id {cases} END FROM {product_table} p "
+            f"WHERE p.id IN ({placeholders}) "
+            f"AND EXISTS (SELECT 1 FROM {cart_table} WHERE id = %s) "
+            f"{on_conflict}"
+        )
+        params = [db_cart_id]
+        for product_id, quantity in quantities.items():
+            params += [product_id, quantity]
+        params += list(quantities) + [db_cart_id]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        return list(self.filter(cart_id=cart_id, product_id__in=list(quantities)))
+
+    def summary(self, cart_id):
+        """
+        Returns one row per line of the cart with its total and the cart total,
+        both computed by the database in a single query.
+        """
+        line_total = ExpressionWrapper(
+            F("quantity") * F("product__unit_price"),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+        return (
+            self.filter(cart_id=cart_id)
+            .order_by("id")
+            .annotate(
+                total_price=line_total,
+                cart_total=Window(Sum(line_total), partition_by=[F("cart_id")]),
+            )
+            .values(
+                "id",
+                "quantity",
+                "total_price",
+                "cart_total",
+                "product_id",
+                "product__title",
+                "product__unit_price",
+                "product__effective_price",
+            )
+        )
 
 
 class CartItem(models.Model):
@@ -129,10 +289,138 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveSmallIntegerField()
 
+    objects = CartItemManager()
+
     class Meta:
         unique_together = [["cart", "product"]]
 
 
+class OutboxEvent(models.Model):
+    TOPIC_ORDER_CREATED = "order_created"
+    TOPIC_ORDER_STATUS_CHANGED = "order_status_changed"
+
+    STATUS_PENDING = "P"
+    STATUS_DELIVERED = "D"
+    STATUS_FAILED = "F"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DELIVERED, "Delivered"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.topic} #{self.id}"
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"])]
+
+
+class SalesRollupManager(models.Manager):
+    def increment(self, rows, batch_size=500):
+        """
+        Adds `{(day, key_id, payment_status): (orders, units, revenue)}` to the
+        rollup with one upsert per batch, so concurrent writers never race on
+        the unique key. Negative values subtract.
+        """
+        rows = list(rows.items())
+        for start in range(0, len(rows), batch_size):
+            self._increment(rows[start : start + batch_size])
+
+    def _increment(self, rows):
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        key_columns = [
+            qn(self.model._meta.get_field(name).column)
+            for name in self.model._meta.constraints[0].fields
+        ]
+        sum_columns = [qn(name) for name in ["orders", "units", "revenue"]]
+        if connection.vendor == "mysql":
+            on_conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(
+                f"{column} = {column} + VALUES({column})" for column in sum_columns
+            )
+        else:
+            on_conflict = (
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+                + ", ".join(
+                    f"{column} = {table}.{column} + excluded.{column}"
+                    for column in sum_columns
+                )
+            )
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))
+        sql = (
+            f"INSERT INTO {table} ({', '.join(key_columns + sum_columns)}) "
+            f"VALUES {values} {on_conflict}"
+        )
+        day_field = self.model._meta.get_field("day")
+        revenue_field = self.model._meta.get_field("revenue")
+        params = []
+        for (day, key_id, payment_status), (orders, units, revenue) in rows:
+            params += [
+                day_field.get_db_prep_value(day, connection),
+                key_id,
+                payment_status,
+                orders,
+                units,
+                revenue_field.get_db_prep_value(revenue, connection),
+            ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class SalesRollup(models.Model):
+    day = models.DateField()
+    payment_status = models.CharField(max_length=1, choices=Order.PAYMENT_CHOICES)
+    # Signed so that moving an order between statuses can never underflow.
+    orders = models.IntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = SalesRollupManager()
+
+    class Meta:
+        abstract = True
+
+
+class DailyProductSales(SalesRollup):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "product", "payment_status"],
+                name="unique_daily_product_sales",
+            )
+        ]
+
+
+class DailyCollectionSales(SalesRollup):
+    collection = models.ForeignKey(
+        Collection, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "collection", "payment_status"],
+                name="unique_daily_collection_sales",
+            )
+        ]
+
+
 class Review(models.Model):
     product = models.ForeignKey(
         Product, on_delete=models.CASCADE, related_name="reviews"
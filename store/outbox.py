@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from store.models import Order, OutboxEvent
+from store.signals import order_created, order_status_changed
+
+MAX_ATTEMPTS = 5
+MAX_BACKOFF_SECONDS = 300
+
+
+def get_backoff(attempts):
+    """Seconds to wait before retrying an event that failed `attempts` times."""
+    return min(2**attempts, MAX_BACKOFF_SECONDS)
+
+
+def publish(topic, **payload):
+    """
+    Records an event in the outbox. Call it inside the transaction that makes
+    the change, so the event exists if and only if the change commits.
+    """
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def _deliver(event, orders):
+    if event.topic == OutboxEvent.TOPIC_ORDER_CREATED:
+        order = orders[event.payload["order_id"]]
+        # The status the order was placed with, it may have changed since.
+        payment_status = event.payload.get("payment_status", order.payment_status)
+        order_created.send(
+            sender=OutboxEvent, order=order, payment_status=payment_status
+        )
+    elif event.topic == OutboxEvent.TOPIC_ORDER_STATUS_CHANGED:
+        order = orders[event.payload["order_id"]]
+        order_status_changed.send(
+            sender=OutboxEvent,
+            order=order,
+            old_status=event.payload["old_status"],
+            new_status=event.payload["new_status"],
+        )
+    else:
+        raise ValueError(f"Unknown outbox topic {event.topic!r}")
+
+
+def deliver_pending(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Delivers the oldest pending events in id order and returns
+    `(delivered, blocked)`.
+
+    Each event is delivered in a savepoint together with its status update,
+    so receivers that write to the database see it exactly once. A failing
+    event stops delivery to keep ordering (`blocked` is True): it is retried
+    with exponential backoff by later calls, once its `next_attempt_at` has
+    passed, until it exhausts `max_attempts` and is parked as failed.
+    """
+    delivered = 0
+    now = timezone.now()
+    with transaction.atomic():
+        # The row locks serialize concurrent drainers, which is what keeps
+        # delivery in order.
+        events = list(
+            OutboxEvent.objects.select_for_update()
+            .filter(status=OutboxEvent.STATUS_PENDING)
+            .order_by("id")[:batch_size]
+        )
+        orders = Order.objects.in_bulk(
+            [
+                event.payload["order_id"]
+                for event in events
+                if "order_id" in event.payload
+            ]
+        )
+
+        for event in events:
+            if event.next_attempt_at and event.next_attempt_at > now:
+                return delivered, True
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    _deliver(event, orders)
+                    event.status = OutboxEvent.STATUS_DELIVERED
+                    event.delivered_at = timezone.now()
+                    event.save(update_fields=["status", "delivered_at", "attempts"])
+                delivered += 1
+            except Exception as error:
+                event.last_error = repr(error)
+                event.next_attempt_at = now + timedelta(
+                    seconds=get_backoff(event.attempts)
+                )
+                if event.attempts >= max_attempts:
+                    event.status = OutboxEvent.STATUS_FAILED
+                event.save(
+                    update_fields=[
+                        "status",
+                        "attempts",
+                        "last_error",
+                        "next_attempt_at",
+                    ]
+                )
+                if event.status == OutboxEvent.STATUS_PENDING:
+                    return delivered, True
+    return delivered, False
+
+
+def get_outbox_cutoff(retention_days=None):
+    if retention_days is None:
+        retention_days = getattr(settings, "STORE_OUTBOX_RETENTION_DAYS", 7)
+    return timezone.now() - timedelta(days=retention_days)
+
+
+def purge_delivered(cutoff, chunk_size=1000):
+    """
+    Deletes events delivered before `cutoff`, oldest first, in short
+    transactions of at most `chunk_size` rows, and yields the number deleted
+    per chunk. Pending and failed events are kept.
+    """
+    while True:
+        with transaction.atomic():
+            event_ids = list(
+                OutboxEvent.objects.filter(
+                    status=OutboxEvent.STATUS_DELIVERED, delivered_at__lt=cutoff
+                )
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not event_ids:
+                return
+            deleted, _ = OutboxEvent.objects.filter(id__in=event_ids).delete()
+        yield deleted
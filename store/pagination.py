@@ -1,5 +1,167 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        `paginate_queryset` on the async ORM: the total is counted with
+        `acount()` and the page is read with `async for`.
+        """
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.page.object_list = [row async for row in self.page.object_list]
+        return self.page.object_list
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seeks past the last row of the previous page on `(ordering field, id)`
+    instead of counting and offsetting, so every page costs the same no matter
+    how deep it is. Each ordering field should be backed by a composite index
+    ending in `id`.
+
+    A total is only computed when `include_total` is passed, and it is capped
+    at `max_total` rows so it never turns into a full COUNT(*).
+    """
+
+    page_size = 10
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    total_query_param = "include_total"
+    ordering_fields = []
+    default_ordering = "id"
+    max_total = 10000
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, request):
+        value = request.query_params.get(self.ordering_query_param, "")
+        ordering = value.split(",")[0].strip()
+        if ordering.lstrip("-") in self.ordering_fields:
+            return ordering
+        return self.default_ordering
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(encoded.encode()).decode()
+            value, pk, direction = json.loads(payload)
+            value = model._meta.get_field(self.field).to_python(value)
+            pk = int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        # Ordering fields are not nullable, a null can only be forged.
+        if value is None or direction not in ("next", "prev"):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, direction
+
+    def encode_cursor(self, row, direction):
+        value = self.get_row_value(row, self.field)
+        if isinstance(value, Decimal):
+            value = str(value)
+        elif isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        payload = json.dumps([value, self.get_row_value(row, "id"), direction])
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_row_value(self, row, name):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, name)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(request)
+        self.field = ordering.lstrip("-")
+        cursor = self.decode_cursor(request, queryset.model)
+
+        self.total = None
+        if request.query_params.get(self.total_query_param):
+            self.total = queryset.order_by()[: self.max_total + 1].count()
+
+        backwards = cursor is not None and cursor[2] == "prev"
+        descending = ordering.startswith("-") != backwards
+        if cursor is not None:
+            value, pk, _ = cursor
+            op = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}": value})
+                | Q(**{self.field: value, f"id__{op}": pk})
+            )
+
+        prefix = "-" if descending else ""
+        rows = list(
+            queryset.order_by(f"{prefix}{self.field}", f"{prefix}id")[
+                : self.page_size + 1
+            ]
+        )
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], "next")
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], "prev")
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.total is not None:
+            response["count"] = min(self.total, self.max_total)
+            response["count_is_exact"] = self.total <= self.max_total
+        return Response(response)
+
+
+class OrderKeysetPagination(KeysetPagination):
+    page_size = 20
+    ordering_fields = ["placed_at"]
+    default_ordering = "-placed_at"
+
+
+class ProductKeysetPagination(KeysetPagination):
+    ordering_fields = ["title", "unit_price", "effective_price", "last_update"]
+    default_ordering = "title"
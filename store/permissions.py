@@ -4,7 +4,7 @@ from rest_framework.permissions import BasePermission
 
 class IsAdminOrReadOnly(BasePermission):
     def has_permission(self, request, view):
-        if request.method == permissions.SAFE_METHODS:
+        if request.method in permissions.SAFE_METHODS:
             return True
         return bool(request.user and request.user.is_staff)
 
@@ -0,0 +1,82 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    Min,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Now, Round
+
+from store.models import Product
+
+CENT = Decimal("0.01")
+
+
+def get_tax_rate():
+    return Decimal(str(getattr(settings, "STORE_TAX_RATE", "0.10")))
+
+
+def price_with_tax(unit_price):
+    return (unit_price * (1 + get_tax_rate())).quantize(CENT, ROUND_HALF_UP)
+
+
+def effective_price_expression():
+    """
+    `unit_price` less the best discount among the product's promotions, plus
+    tax, rounded to cents. Evaluated by the database for every row of an
+    UPDATE, so pricing any number of products takes one statement.
+    """
+    best_discount = Subquery(
+        Product.promotions.through.objects.filter(product_id=OuterRef("pk"))
+        .order_by()
+        .values("product_id")
+        .annotate(best=Max("promotion__discount"))
+        .values("best"),
+        output_field=FloatField(),
+    )
+    # Discounts are fractions of the price, anything outside [0, 1] is noise.
+    discount = Least(
+        Greatest(Coalesce(best_discount, Value(0.0)), Value(0.0)), Value(1.0)
+    )
+    price = ExpressionWrapper(
+        F("unit_price")
+        * Cast(Value(1.0) - discount, DecimalField(max_digits=7, decimal_places=6))
+        * Value(1 + get_tax_rate()),
+        output_field=DecimalField(max_digits=16, decimal_places=8),
+    )
+    return Round(price, 2, output_field=DecimalField(max_digits=8, decimal_places=2))
+
+
+def recompute_effective_prices(product_ids=None, chunk_size=5000):
+    """
+    Recomputes `Product.effective_price` for the given product ids, or for
+    every product, one UPDATE per chunk. Returns the number of rows updated.
+    """
+    if product_ids is None:
+        bounds = Product.objects.order_by().aggregate(first=Min("id"), last=Max("id"))
+        if bounds["last"] is None:
+            return 0
+        chunks = (
+            Product.objects.filter(id__gte=start, id__lt=start + chunk_size)
+            for start in range(bounds["first"], bounds["last"] + 1, chunk_size)
+        )
+    else:
+        product_ids = sorted(set(product_ids))
+        chunks = (
+            Product.objects.filter(id__in=product_ids[index : index + chunk_size])
+            for index in range(0, len(product_ids), chunk_size)
+        )
+
+    updated = 0
+    for products in chunks:
+        updated += products.update(
+            effective_price=effective_price_expression(), last_update=Now()
+        )
+    return updated
@@ -0,0 +1,143 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.expressions import RawSQL
+
+from store.models import Product, ProductSearchTerm
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    return [
+        token
+        for token in TOKEN_RE.findall((text or "").lower())
+        if 1 < len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def tokenize_query(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def build_terms(title, description):
+    weights = Counter()
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(description):
+        weights[token] += 1
+    return weights
+
+
+class InvertedIndexBackend:
+    """
+    Keeps a term -> product posting table in the database.
+
+    A lookup only reads the postings of the searched terms through the `term`
+    index, so its cost does not grow with the length of product descriptions.
+    All terms must match; relevance is the sum of their weights.
+    """
+
+    def index(self, products):
+        products = list(products)
+        ProductSearchTerm.objects.filter(
+            product_id__in=[product.id for product in products]
+        ).delete()
+        ProductSearchTerm.objects.bulk_create(
+            [
+                ProductSearchTerm(product_id=product.id, term=term, weight=weight)
+                for product in products
+                for term, weight in build_terms(
+                    product.title, product.description
+                ).items()
+            ],
+            batch_size=5000,
+        )
+
+    def clear(self):
+        ProductSearchTerm.objects.all().delete()
+
+    def search(self, queryset, query):
+        terms = tokenize_query(query)
+        if not terms:
+            return queryset.none()
+
+        matches = (
+            ProductSearchTerm.objects.filter(term__in=terms)
+            .values("product_id")
+            .annotate(score=Sum("weight"), matched=Count("term"))
+            .filter(matched=len(terms))
+        )
+        relevance = Subquery(
+            matches.filter(product_id=OuterRef("pk")).values("score")[:1],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches.values("product_id")).annotate(
+            relevance=relevance
+        )
+
+
+class FullTextBackend:
+    """
+    Uses the MySQL FULLTEXT index on `(title, description)` in boolean mode,
+    requiring every term to match as a whole word, like the inverted index.
+    Relevance is MySQL's own score, and InnoDB skips its stopwords and words
+    shorter than `innodb_ft_min_token_size`, so a term that the inverted
+    index would match may match nothing here.
+    """
+
+    def index(self, products):
+        # InnoDB maintains FULLTEXT indexes itself.
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, queryset, query):
+        terms = tokenize_query(query)
+        if not terms:
+            return queryset.none()
+
+        table = connection.ops.quote_name(Product._meta.db_table)
+        match = (
+            f"MATCH({table}.title, {table}.description) AGAINST (%s IN BOOLEAN MODE)"
+        )
+        against = " ".join(f"+{term}" for term in terms)
+        return queryset.annotate(
+            relevance=RawSQL(match, [against], output_field=FloatField())
+        ).filter(relevance__gt=0)
+
+
+BACKENDS = {
+    "inverted_index": InvertedIndexBackend,
+    "fulltext": FullTextBackend,
+}
+
+
+def get_search_backend():
+    name = getattr(settings, "STORE_SEARCH_BACKEND", None)
+    if name is None:
+        name = "fulltext" if connection.vendor == "mysql" else "inverted_index"
+    return BACKENDS[name]()
+
+
+def rebuild_index(chunk_size=2000):
+    backend = get_search_backend()
+    backend.clear()
+    chunk = []
+    indexed = 0
+    products = Product.objects.only("id", "title", "description").order_by()
+    for product in products.iterator(chunk_size=chunk_size):
+        chunk.append(product)
+        if len(chunk) == chunk_size:
+            backend.index(chunk)
+            indexed += len(chunk)
+            chunk = []
+    backend.index(chunk)
+    return indexed + len(chunk)
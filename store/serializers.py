@@ -1,8 +1,13 @@
-from decimal import Decimal
+import re
+from collections import defaultdict
+from django.core.files.storage import FileSystemStorage
 from django.db import transaction
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 
-from .signals import order_created
+from .inventory import reserve_inventory
+from .outbox import publish
+from .pricing import price_with_tax
 from store.models import (
     Cart,
     CartItem,
@@ -10,6 +15,7 @@ from store.models import (
     Customer,
     Order,
     OrderItems,
+    OutboxEvent,
     Product,
     ProductImage,
     Review,
@@ -25,13 +31,21 @@ class CollectionSerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    # Empty until the generate_image_variants task has run.
+    variants = serializers.SerializerMethodField()
+
     def create(self, validated_data):
         product_id = self.context["product_id"]
         return ProductImage.objects.create(product_id=product_id, **validated_data)
 
+    def get_variants(self, image: ProductImage):
+        return variant_urls(
+            image.variants, image_url_builder(self.context.get("request"))
+        )
+
     class Meta:
         model = ProductImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "width", "height", "variants"]
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -47,6 +61,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "description",
             "unit_price",
             "price_with_tax",
+            "effective_price",
             "collection",
             "images",
         ]
@@ -54,7 +69,140 @@ class ProductSerializer(serializers.ModelSerializer):
     price_with_tax = serializers.SerializerMethodField(method_name="calc_tax")
 
     def calc_tax(self, product: Product):
-        return product.unit_price * Decimal(1.1)
+        return price_with_tax(product.unit_price)
+
+
+class ProductListSerializer:
+    """
+    Read-only stand-in for `ProductSerializer(many=True)` on list pages.
+
+    Builds the same representation from `values()` rows and a single query
+    for their images, without creating serializer and field instances.
+    """
+
+    value_fields = [
+        "id",
+        "title",
+        "slug",
+        "inventory",
+        "description",
+        "unit_price",
+        "effective_price",
+        "collection_id",
+        "last_update",
+    ]
+
+    def __init__(self, instance=None, many=True, context=None, **kwargs):
+        self.instance = instance
+        self.context = context or {}
+
+    @property
+    def data(self):
+        rows = list(self.instance)
+        images = group_image_rows([row["id"] for row in rows])
+        return serialize_products(rows, images, self.context.get("request"))
+
+
+def image_rows(product_ids):
+    return ProductImage.objects.filter(product_id__in=product_ids).values(
+        "id", "product_id", "image", "width", "height", "variants"
+    )
+
+
+def group_image_rows(product_ids):
+    images = defaultdict(list)
+    for row in image_rows(product_ids):
+        images[row["product_id"]].append(row)
+    return images
+
+
+PLAIN_FILE_NAME_RE = re.compile(r"[\w-]+(?:/[\w-]+)*(?:\.\w+)*\Z", re.ASCII)
+
+
+def image_url_builder(request=None):
+    """
+    Returns a function mapping a stored image name to the URL the image
+    field would render for it.
+    """
+    storage = ProductImage._meta.get_field("image").storage
+    base_url = storage.url("")
+    if request is not None:
+        base_url = request.build_absolute_uri(base_url)
+
+    def image_url(name):
+        if not name:
+            return None
+        # Names that need no quoting or joining are appended to the absolute
+        # media URL, which is what `storage.url()` and `build_absolute_uri()`
+        # would return for them anyway.
+        if isinstance(storage, FileSystemStorage) and PLAIN_FILE_NAME_RE.match(name):
+            return base_url + name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return image_url
+
+
+def variant_urls(variants, image_url):
+    return {name: image_url(variant["name"]) for name, variant in variants.items()}
+
+
+def serialize_products(rows, images, request=None):
+    """
+    Builds the same representation as `ProductSerializer` from product rows
+    and their image rows grouped by product id.
+    """
+    image_url = image_url_builder(request)
+    return [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "slug": row["slug"],
+            "inventory": row["inventory"],
+            "description": row["description"],
+            "unit_price": row["unit_price"],
+            "price_with_tax": price_with_tax(row["unit_price"]),
+            "effective_price": row["effective_price"],
+            "collection": row["collection_id"],
+            "images": [
+                {
+                    "id": image["id"],
+                    "image": image_url(image["image"]),
+                    "width": image["width"],
+                    "height": image["height"],
+                    "variants": variant_urls(image["variants"], image_url),
+                }
+                for image in images.get(row["id"], [])
+            ],
+        }
+        for row in rows
+    ]
+
+
+class CollectionImportSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    title = serializers.CharField(max_length=255)
+
+
+class PromotionImportSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    description = serializers.CharField(max_length=255)
+    discount = serializers.FloatField(min_value=0, max_value=1)
+
+
+class ProductImportSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    title = serializers.CharField(max_length=225)
+    slug = serializers.SlugField(required=False, allow_null=True, allow_blank=True)
+    description = serializers.CharField(
+        required=False, allow_null=True, allow_blank=True
+    )
+    unit_price = serializers.DecimalField(max_digits=6, decimal_places=2)
+    inventory = serializers.IntegerField()
+    collection_id = serializers.IntegerField()
+    promotion_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -70,7 +218,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 class SimpleProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = ["id", "title", "unit_price"]
+        fields = ["id", "title", "unit_price", "effective_price"]
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -100,29 +248,48 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ["id", "items", "total_price"]
 
 
+def serialize_cart(cart_id, rows):
+    """
+    Builds the same representation as `CartSerializer` from
+    `CartItem.objects.summary()` rows, without instantiating serializers.
+    """
+    return {
+        "id": str(cart_id),
+        "items": [
+            {
+                "id": row["id"],
+                "product": {
+                    "id": row["product_id"],
+                    "title": row["product__title"],
+                    "unit_price": row["product__unit_price"],
+                    "effective_price": row["product__effective_price"],
+                },
+                "quantity": row["quantity"],
+                "total_price": row["total_price"],
+            }
+            for row in rows
+        ],
+        "total_price": rows[0]["cart_total"] if rows else 0,
+    }
+
+
 class AddCartItemSerializer(serializers.ModelSerializer):
     product_id = serializers.IntegerField()
 
-    def validate_product_id(self, value):
-        if not Product.objects.filter(pk=value).exists():
-            raise serializers.ValidationError("no product found with this id")
-        return value
-
     def save(self, **kwargs):
         cart_id = self.context["cart_id"]
         product_id = self.validated_data["product_id"]
         quantity = self.validated_data["quantity"]
 
-        try:
-            cart_item = CartItem.objects.get(cart_id=cart_id, product_id=product_id)
-            cart_item.quantity += quantity
-            cart_item.save()
-            self.instance = cart_item
-        except CartItem.DoesNotExist:
-            self.instance = CartItem.objects.create(
-                cart_id=cart_id, **self.validated_data
+        cart_items = CartItem.objects.add_items(cart_id, {product_id: quantity})
+        if not cart_items:
+            if not Cart.objects.filter(pk=cart_id).exists():
+                raise NotFound("No cart with given id was found")
+            raise serializers.ValidationError(
+                {"product_id": ["no product found with this id"]}
             )
 
+        self.instance = cart_items[0]
         return self.instance
 
     class Meta:
@@ -130,6 +297,36 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         fields = ["id", "product_id", "quantity"]
 
 
+class BulkAddCartItemSerializer(serializers.Serializer):
+    items = AddCartItemSerializer(many=True, allow_empty=False, max_length=100)
+
+    def save(self, **kwargs):
+        cart_id = self.context["cart_id"]
+        quantities = {}
+        for item in self.validated_data["items"]:
+            product_id = item["product_id"]
+            quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+
+        with transaction.atomic():
+            cart_items = CartItem.objects.add_items(cart_id, quantities)
+            if not cart_items and not Cart.objects.filter(pk=cart_id).exists():
+                raise NotFound("No cart with given id was found")
+
+            missing = set(quantities) - {item.product_id for item in cart_items}
+            if missing:
+                raise serializers.ValidationError(
+                    {
+                        "items": [
+                            f"no product found with id {product_id}"
+                            for product_id in sorted(missing)
+                        ]
+                    }
+                )
+
+        self.instance = cart_items
+        return self.instance
+
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
@@ -164,35 +361,46 @@ class CreateOrderSerializer(serializers.Serializer):
     cart_id = serializers.UUIDField()
 
     def validate_cart_id(self, cart_id):
-        if Cart.objects.filter(pk=cart_id).exists():
+        if not Cart.objects.filter(pk=cart_id).exists():
             raise serializers.ValidationError("No cart with given id was found")
-        if CartItem.objects.filter(cart_id=cart_id).count() == 0:
+        if not CartItem.objects.filter(cart_id=cart_id).exists():
             raise serializers.ValidationError("The cart is empty")
         return cart_id
 
     def save(self, **kwargs):
         with transaction.atomic():
-            customer = Customer.objects.get(user_id=self.context["user_id"])
-            order = Order.objects.create(customer=customer)
-
-            cart_items = CartItem.objects.select_related("product").filter(
-                cart_id=self.validated_data["cart_id"]
+            cart_id = self.validated_data["cart_id"]
+            quantities = dict(
+                CartItem.objects.filter(cart_id=cart_id).values_list(
+                    "product_id", "quantity"
+                )
             )
+
+            products, errors = reserve_inventory(quantities)
+            if errors:
+                raise serializers.ValidationError({"items": errors})
+
+            order = Order.objects.create(customer_id=self.context["customer_id"])
             order_items = [
                 OrderItems(
                     order=order,
-                    product=item.product,
-                    unit_price=item.product.unit_price,
-                    quantity=item.quantity,
+                    product_id=product_id,
+                    collection_id=products[product_id]["collection_id"],
+                    unit_price=products[product_id]["unit_price"],
+                    quantity=quantity,
                 )
-                for item in cart_items
+                for product_id, quantity in quantities.items()
             ]
 
             OrderItems.objects.bulk_create(order_items)
 
-            Cart.objects.filter(pk=self.validated_data["cart_id"]).delete()
+            Cart.objects.filter(pk=cart_id).delete()
 
-            order_created.send_robust(self.__class__, order=order)
+            publish(
+                OutboxEvent.TOPIC_ORDER_CREATED,
+                order_id=order.id,
+                payment_status=order.payment_status,
+            )
 
             return order
 
@@ -1,10 +1,180 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from store.models import Customer
+from store.cache import (
+    GENERATION_SCOPE,
+    bump_product_versions_on_commit,
+    bump_versions_on_commit,
+)
+from store.counters import adjust_products_count
+from store.images import delete_image_files, touch_product
+from store.models import (
+    Collection,
+    Customer,
+    Order,
+    OutboxEvent,
+    Product,
+    ProductImage,
+    Promotion,
+)
+from store.outbox import publish
+from store.pricing import recompute_effective_prices
+from store.sales import record_order, record_status_change
+from store.search import get_search_backend
+from store.signals import order_created, order_status_changed
+from store.tasks import generate_image_variants
+from tags.models import TaggedItem
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_customer_for_new_users(sender, **kwargs):
     if kwargs["created"]:
         Customer.objects.create(user=kwargs["instance"])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    # post_save runs before Product.save refreshes _loaded_values, so a
+    # product moved between collections busts both collection lists.
+    loaded_values = getattr(instance, "_loaded_values", {})
+    bump_product_versions_on_commit(
+        instance.pk, instance.collection_id, loaded_values.get("collection_id")
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_collection_products_count(sender, instance, created, **kwargs):
+    previous_collection_id = getattr(instance, "_loaded_values", {}).get(
+        "collection_id"
+    )
+    if created:
+        adjust_products_count(instance.collection_id, 1)
+    elif previous_collection_id not in (None, instance.collection_id):
+        adjust_products_count(previous_collection_id, -1)
+        adjust_products_count(instance.collection_id, 1)
+
+
+@receiver(post_delete, sender=Product)
+def decrement_collection_products_count(sender, instance, **kwargs):
+    adjust_products_count(instance.collection_id, -1)
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, created, **kwargs):
+    loaded_values = getattr(instance, "_loaded_values", {})
+    if (
+        created
+        or loaded_values.get("title") != instance.title
+        or loaded_values.get("description") != instance.description
+    ):
+        get_search_backend().index([instance])
+
+
+@receiver(post_save, sender=Product)
+def update_effective_price(sender, instance, created, **kwargs):
+    loaded_values = getattr(instance, "_loaded_values", {})
+    if created or loaded_values.get("unit_price") != instance.unit_price:
+        recompute_effective_prices([instance.pk])
+        instance.refresh_from_db(fields=["effective_price", "last_update"])
+
+
+@receiver(post_save, sender=Promotion)
+def reprice_promoted_products(sender, instance, created, **kwargs):
+    if not created:
+        recompute_effective_prices(
+            Product.promotions.through.objects.filter(
+                promotion_id=instance.pk
+            ).values_list("product_id", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Promotion)
+def remember_promoted_products(sender, instance, **kwargs):
+    # The memberships are gone by post_delete.
+    instance._promoted_product_ids = list(
+        instance.product_set.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Promotion)
+def reprice_formerly_promoted_products(sender, instance, **kwargs):
+    recompute_effective_prices(getattr(instance, "_promoted_product_ids", []))
+
+
+@receiver(m2m_changed, sender=Product.promotions.through)
+def reprice_on_promotions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._promoted_product_ids = list(
+            instance.product_set.values_list("id", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        product_ids = [instance.pk]
+    elif action == "post_clear":
+        product_ids = getattr(instance, "_promoted_product_ids", [])
+    else:
+        product_ids = pk_set
+    recompute_effective_prices(product_ids)
+    bump_versions_on_commit(GENERATION_SCOPE)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_image_cache(sender, instance, **kwargs):
+    touch_product(instance.product_id)
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_product_image_files(sender, instance, **kwargs):
+    # Only once the row is gone for good, a rollback must keep the files.
+    transaction.on_commit(lambda: delete_image_files(instance))
+
+
+@receiver(post_save, sender=ProductImage)
+def enqueue_image_variants(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields is None or "image" in update_fields:
+        image_id = instance.pk
+        transaction.on_commit(lambda: generate_image_variants.delay(image_id))
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def invalidate_tagged_product_cache(sender, instance, **kwargs):
+    # Tag filters change which list pages a product appears on.
+    if instance.content_type_id == ContentType.objects.get_for_model(Product).id:
+        touch_product(instance.object_id)
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_versions_on_commit(GENERATION_SCOPE)
+
+
+@receiver(post_save, sender=Order)
+def publish_payment_status_change(sender, instance, created, **kwargs):
+    old_status = getattr(instance, "_loaded_values", {}).get("payment_status")
+    if not created and old_status not in (None, instance.payment_status):
+        publish(
+            OutboxEvent.TOPIC_ORDER_STATUS_CHANGED,
+            order_id=instance.id,
+            old_status=old_status,
+            new_status=instance.payment_status,
+        )
+
+
+@receiver(order_created)
+def add_order_to_sales_rollups(sender, order, payment_status, **kwargs):
+    record_order(order, payment_status)
+
+
+@receiver(order_status_changed)
+def move_order_between_sales_rollups(sender, order, old_status, new_status, **kwargs):
+    record_status_change(order, old_status, new_status)
@@ -0,0 +1,48 @@
+from celery import shared_task
+
+from store.carts import get_cart_cutoff, purge_abandoned_carts
+from store.images import generate_variants
+from store.models import ProductImage
+from store.outbox import deliver_pending, get_outbox_cutoff, purge_delivered
+
+
+@shared_task
+def deliver_outbox_events(batch_size=100, max_batches=10):
+    # Beat is the only scheduler: failed events wait for their
+    # next_attempt_at, and a backlog larger than max_batches is left to the
+    # next run.
+    total = 0
+    for _ in range(max_batches):
+        delivered, blocked = deliver_pending(batch_size)
+        total += delivered
+        if blocked or delivered < batch_size:
+            break
+    return total
+
+
+@shared_task
+def purge_outbox_events(chunk_size=1000):
+    return sum(purge_delivered(get_outbox_cutoff(), chunk_size))
+
+
+@shared_task
+def purge_carts(chunk_size=500, max_chunks=20):
+    cutoff = get_cart_cutoff()
+    deleted = 0
+    for chunk, (carts, _) in enumerate(
+        purge_abandoned_carts(cutoff, chunk_size), start=1
+    ):
+        deleted += carts
+        if chunk == max_chunks:
+            # Leave the rest to a fresh task instead of hogging a worker.
+            purge_carts.delay(chunk_size, max_chunks)
+            break
+    return deleted
+
+
+@shared_task
+def generate_image_variants(image_id):
+    image = ProductImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image:
+        return False
+    return generate_variants(image)
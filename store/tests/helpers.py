@@ -0,0 +1,30 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.serializers import TokenObtainPairSerializer
+
+
+@override_settings(DATABASE_REPLICAS=[])
+class StoreTestCase(TestCase):
+    """
+    Serves every read from the primary: the test replica is a second
+    connection that cannot see the test's uncommitted transaction. Replica
+    routing itself is tested in `core.tests.test_routers`.
+    """
+
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        # Cached responses and throttle buckets must not leak between tests.
+        for cache in caches.all():
+            cache.clear()
+
+
+def token_client(user):
+    """An API client sending a real access token for `user`."""
+    client = APIClient()
+    token = TokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"JWT {token}")
+    return client
@@ -0,0 +1,58 @@
+from django.contrib.contenttypes.models import ContentType
+
+from store.models import Collection, Product
+from store.tests.helpers import StoreTestCase
+from tags.models import Tag, TaggedItem
+
+
+class AsyncProductListTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tools = Collection.objects.create(title="Tools")
+        cls.tag = Tag.objects.create(label="Sale")
+        for index in range(15):
+            product = Product.objects.create(
+                title=f"Product {index}",
+                unit_price=index + 1,
+                inventory=1,
+                collection=cls.tools,
+            )
+            if index % 2:
+                TaggedItem.objects.create(
+                    tag=cls.tag,
+                    content_type=ContentType.objects.get_for_model(Product),
+                    object_id=product.id,
+                )
+
+    async def test_payloads_match_the_drf_list(self):
+        for query_string in [
+            "",
+            "page=2",
+            "unit_price__gt=3&unit_price__lt=12",
+            f"tag={self.tag.id}&collection_id={self.tools.id}",
+        ]:
+            with self.subTest(query_string=query_string):
+                expected = await self.async_client.get(
+                    f"/store/products/?{query_string}"
+                )
+                response = await self.async_client.get(
+                    f"/store/async/products/?{query_string}"
+                )
+                self.assertEqual(response.status_code, 200)
+                payload = response.json()
+                for link in ["next", "previous"]:
+                    if payload[link]:
+                        payload[link] = payload[link].replace("/async/", "/", 1)
+                self.assertEqual(payload, expected.json())
+                self.assertGreater(payload["count"], 0)
+
+    async def test_bad_input_is_rejected_alike(self):
+        for query_string, status in [
+            ("page=9", 404),
+            ("unit_price__gt=x", 400),
+            ("collection_id=0", 400),
+        ]:
+            with self.subTest(query_string=query_string):
+                for url in ["/store/products/", "/store/async/products/"]:
+                    response = await self.async_client.get(f"{url}?{query_string}")
+                    self.assertEqual(response.status_code, status)
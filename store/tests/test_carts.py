@@ -0,0 +1,83 @@
+from store.models import Cart, CartItem, Collection, Product
+from store.tests.helpers import StoreTestCase
+
+
+class CartItemTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        collection = Collection.objects.create(title="Tools")
+        cls.hammer, cls.saw = [
+            Product.objects.create(
+                title=title, unit_price=10, inventory=5, collection=collection
+            )
+            for title in ["Hammer", "Saw"]
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.cart = Cart.objects.create()
+        self.url = f"/store/carts/{self.cart.id}/items/"
+
+    def get_quantities(self):
+        return dict(
+            CartItem.objects.filter(cart=self.cart).values_list(
+                "product_id", "quantity"
+            )
+        )
+
+    def test_adding_a_product_twice_adds_up_the_quantity(self):
+        for quantity in [2, 3]:
+            response = self.client.post(
+                self.url,
+                {"product_id": self.hammer.id, "quantity": quantity},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["quantity"], 5)
+        self.assertEqual(self.get_quantities(), {self.hammer.id: 5})
+
+    def test_bulk_add_merges_duplicates(self):
+        CartItem.objects.add_items(self.cart.id, {self.hammer.id: 1})
+        response = self.client.post(
+            f"{self.url}bulk/",
+            {
+                "items": [
+                    {"product_id": self.hammer.id, "quantity": 1},
+                    {"product_id": self.saw.id, "quantity": 2},
+                    {"product_id": self.hammer.id, "quantity": 3},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_quantities(), {self.hammer.id: 5, self.saw.id: 2})
+
+    def test_unknown_products_are_rejected(self):
+        response = self.client.post(
+            self.url, {"product_id": 0, "quantity": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("product_id", response.data)
+
+        response = self.client.post(
+            f"{self.url}bulk/",
+            {
+                "items": [
+                    {"product_id": self.hammer.id, "quantity": 1},
+                    {"product_id": 0, "quantity": 1},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["items"], ["no product found with id 0"])
+        # The bulk add is all or nothing.
+        self.assertEqual(self.get_quantities(), {})
+
+    def test_unknown_cart_is_not_found(self):
+        response = self.client.post(
+            "/store/carts/00000000-0000-0000-0000-000000000000/items/",
+            {"product_id": self.hammer.id, "quantity": 1},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+
+from store.models import Collection, Product, ProductSearchTerm, Promotion
+from store.tests.helpers import StoreTestCase, token_client
+
+HEADER = "id,title,slug,description,unit_price,inventory,collection_id,promotion_ids\n"
+
+
+class CatalogImportTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.collection = Collection.objects.create(title="Tools")
+        cls.product = Product.objects.create(
+            title="Hammer", unit_price=10, inventory=5, collection=cls.collection
+        )
+        cls.promotion = Promotion.objects.create(description="Sale", discount=0.5)
+        cls.staff = get_user_model().objects.create_superuser("staff")
+
+    def setUp(self):
+        super().setUp()
+        self.client = token_client(self.staff)
+
+    def import_products(self, body, content_type="text/csv"):
+        return self.client.post(
+            "/store/catalog/products/import/", body, content_type=content_type
+        )
+
+    def test_valid_rows_are_saved_and_bad_rows_reported_by_line(self):
+        response = self.import_products(
+            HEADER
+            + f",Saw,saw,,12.50,3,{self.collection.id},{self.promotion.id}\n"
+            + f"{self.product.id},Claw hammer,claw-hammer,,11,4,{self.collection.id},\n"
+            + f",Free,free,,free,1,{self.collection.id},\n"
+            + ",Lost,lost,,1,1,0,\n"
+            + f",Unknown promotion,unknown,,1,1,{self.collection.id},0\n"
+        )
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()
+        self.assertEqual(
+            (summary["created"], summary["updated"], summary["failed"]), (1, 1, 3)
+        )
+        self.assertEqual([error["line"] for error in summary["errors"]], [4, 5, 6])
+        self.assertIn("unit_price", summary["errors"][0]["errors"])
+        self.assertIn("collection_id", summary["errors"][1]["errors"])
+        self.assertIn("promotion_ids", summary["errors"][2]["errors"])
+
+        saw = Product.objects.get(slug="saw")
+        self.assertEqual(list(saw.promotions.all()), [self.promotion])
+        self.assertEqual(str(saw.effective_price), "6.88")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.title, "Claw hammer")
+        self.assertFalse(Product.objects.filter(slug__in=["free", "lost"]).exists())
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.products_count, 2)
+
+    def test_collection_counts_follow_new_and_moved_products(self):
+        garden = Collection.objects.create(title="Garden")
+        # A stale count elsewhere is left alone, only changed collections move.
+        Collection.objects.filter(id=garden.id).update(products_count=7)
+        toys = Collection.objects.create(title="Toys")
+        response = self.import_products(
+            HEADER
+            + f",Saw,saw,,12,3,{self.collection.id},\n"
+            + f",Ball,ball,,2,3,{toys.id},\n"
+            + f"{self.product.id},Hammer,hammer,,10,5,{toys.id},\n"
+        )
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(
+            dict(Collection.objects.values_list("title", "products_count")),
+            {"Tools": 1, "Garden": 7, "Toys": 2},
+        )
+
+    @override_settings(STORE_SEARCH_BACKEND="inverted_index")
+    def test_partial_ndjson_rows_keep_the_missing_fields(self):
+        Product.objects.filter(id=self.product.id).update(
+            slug="hammer", description="Steel head"
+        )
+        self.product.refresh_from_db()
+        self.product.save()  # Index the description.
+        response = self.import_products(
+            f'{{"id": {self.product.id}, "title": "Claw hammer", "unit_price": "11", '
+            f'"inventory": 4, "collection_id": {self.collection.id}}}\n',
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.json()["updated"], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.title, self.product.slug, self.product.description),
+            ("Claw hammer", "hammer", "Steel head"),
+        )
+        self.assertEqual(
+            set(
+                ProductSearchTerm.objects.filter(product=self.product).values_list(
+                    "term", flat=True
+                )
+            ),
+            {"claw", "hammer", "steel", "head"},
+        )
+
+        # A CSV row carries every column, an empty cell clears the field.
+        self.import_products(
+            HEADER
+            + f"{self.product.id},Claw hammer,hammer,,11,4,{self.collection.id},\n"
+        )
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.description)
+
+    def test_unparsable_ndjson_lines_are_reported(self):
+        response = self.import_products(
+            '{"title": "Saw", "unit_price": "3", "inventory": 1, '
+            f'"collection_id": {self.collection.id}}}\n'
+            "{oops\n"
+            "\n"
+            "[1]\n",
+            content_type="application/x-ndjson",
+        )
+        summary = response.json()
+        self.assertEqual((summary["created"], summary["failed"]), (1, 2))
+        self.assertEqual([error["line"] for error in summary["errors"]], [2, 4])
+
+    def test_unsupported_content_type_is_rejected(self):
+        response = self.import_products("x", content_type="text/plain")
+        self.assertEqual(response.status_code, 400)
+
+    def test_customers_cannot_import(self):
+        customer = get_user_model().objects.create_user("customer")
+        response = token_client(customer).post(
+            "/store/catalog/products/import/", HEADER, content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @mock.patch.object(
+        type(connection.features), "can_return_rows_from_bulk_insert", False
+    )
+    def test_new_rows_get_their_ids_without_returning_inserts(self):
+        other = Promotion.objects.create(description="Clearance", discount=0.2)
+        response = self.import_products(
+            HEADER
+            + f",Saw,saw,,10,3,{self.collection.id},{self.promotion.id}\n"
+            + f",Saw,saw,,10,3,{self.collection.id},{other.id}\n"
+            + f",Drill,drill,,20,1,{self.collection.id},\n"
+        )
+        self.assertEqual(response.json()["created"], 3)
+
+        saws = Product.objects.filter(slug="saw").order_by("id")
+        self.assertEqual(
+            [list(saw.promotions.all()) for saw in saws],
+            [[self.promotion], [other]],
+        )
+        self.assertEqual([str(saw.effective_price) for saw in saws], ["5.50", "8.80"])
+        self.assertEqual(
+            str(Product.objects.get(slug="drill").effective_price), "22.00"
+        )
+
+        response = self.client.post(
+            "/store/catalog/collections/import/",
+            "id,title\n,Garden\n,Garden\n",
+            content_type="text/csv",
+        )
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(Collection.objects.filter(title="Garden").count(), 2)
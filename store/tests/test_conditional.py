@@ -0,0 +1,76 @@
+from store.models import Collection, Product
+from store.tests.helpers import StoreTestCase
+
+
+class ConditionalGetTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        collection = Collection.objects.create(title="Tools")
+        cls.product = Product.objects.create(
+            title="Hammer", unit_price=10, inventory=5, collection=collection
+        )
+
+    def update_product(self):
+        # Cache versions are bumped once the write commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.inventory += 1
+            self.product.save()
+
+    def assertRevalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_product_list(self):
+        self.assertRevalidates("/store/products/", self.update_product)
+
+    def test_product_list_is_revalidated_without_queries(self):
+        etag = self.client.get("/store/products/?page=1")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/store/products/?page=1", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_detail(self):
+        url = f"/store/products/{self.product.id}/"
+        self.assertRevalidates(url, self.update_product)
+
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_collection_list(self):
+        def add_product():
+            with self.captureOnCommitCallbacks(execute=True):
+                Product.objects.create(
+                    title="Saw",
+                    unit_price=5,
+                    inventory=1,
+                    collection=self.product.collection,
+                )
+
+        self.assertRevalidates("/store/collections/", add_product)
+
+    def test_missing_rows_are_not_found(self):
+        for url in [
+            "/store/products/0/",
+            f"/store/products/{self.product.id}/images/0/",
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+                self.assertEqual(response.status_code, 404)
+                self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,50 @@
+from store.counters import adjust_products_count, recount_products
+from store.models import Collection, Product
+from store.tests.helpers import StoreTestCase
+
+
+class ProductsCountTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.collection = Collection.objects.create(title="Tools")
+        cls.other = Collection.objects.create(title="Toys")
+        cls.product = Product.objects.create(
+            title="Hammer", unit_price=10, inventory=1, collection=cls.collection
+        )
+
+    def get_count(self, collection):
+        collection.refresh_from_db(fields=["products_count"])
+        return collection.products_count
+
+    def test_product_changes_keep_the_count(self):
+        self.assertEqual(self.get_count(self.collection), 1)
+        self.product.collection = self.other
+        self.product.save()
+        self.assertEqual(self.get_count(self.collection), 0)
+        self.assertEqual(self.get_count(self.other), 1)
+        self.product.delete()
+        self.assertEqual(self.get_count(self.other), 0)
+
+    def test_decrement_stops_at_zero_when_the_count_drifted(self):
+        Collection.objects.filter(pk=self.collection.pk).update(products_count=1)
+        adjust_products_count(self.collection.pk, -3)
+        self.assertEqual(self.get_count(self.collection), 0)
+
+    def test_recount_reports_and_fixes_drift(self):
+        Collection.objects.filter(pk=self.collection.pk).update(products_count=5)
+        Collection.objects.filter(pk=self.other.pk).update(products_count=2)
+
+        mismatches = recount_products(fix=False)
+        self.assertEqual(
+            sorted(
+                (collection.pk, stored, actual)
+                for collection, stored, actual in mismatches
+            ),
+            [(self.collection.pk, 5, 1), (self.other.pk, 2, 0)],
+        )
+        self.assertEqual(self.get_count(self.collection), 5)
+
+        recount_products()
+        self.assertEqual(self.get_count(self.collection), 1)
+        self.assertEqual(self.get_count(self.other), 0)
+        self.assertEqual(recount_products(), [])
@@ -0,0 +1,73 @@
+from django.test import override_settings
+
+from store.models import Collection, Product
+from store.tests.helpers import StoreTestCase
+
+
+@override_settings(STORE_PRICE_BUCKETS=[10, 25], STORE_SEARCH_BACKEND="inverted_index")
+class ProductFacetTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tools = Collection.objects.create(title="Tools")
+        cls.toys = Collection.objects.create(title="Toys")
+        for title, price, collection in [
+            ("Small hammer", "9.99", cls.tools),
+            ("Hammer", "10", cls.tools),
+            ("Saw", "24.99", cls.tools),
+            ("Big hammer", "25", cls.tools),
+            ("Toy hammer", "10", cls.toys),
+            ("Kite", "40", cls.toys),
+        ]:
+            Product.objects.create(
+                title=title, unit_price=price, inventory=1, collection=collection
+            )
+
+    def facets(self, query_string=""):
+        response = self.client.get(f"/store/products/facets/?{query_string}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prices_are_bucketed_with_inclusive_lower_bounds(self):
+        self.assertEqual(
+            [
+                (bucket["min"], bucket["max"], bucket["count"])
+                for bucket in self.facets()["prices"]
+            ],
+            [(None, 10, 1), (10, 25, 3), (25, None, 2)],
+        )
+
+    def test_collections_are_counted_most_products_first(self):
+        self.assertEqual(
+            self.facets()["collections"],
+            [
+                {"id": self.tools.id, "title": "Tools", "count": 4},
+                {"id": self.toys.id, "title": "Toys", "count": 2},
+            ],
+        )
+
+    def test_facets_count_the_same_products_as_the_list(self):
+        for query_string in [
+            "",
+            "search=hammer",
+            f"collection_id={self.tools.id}",
+            "unit_price__gt=9.99&unit_price__lt=25",
+            f"search=hammer&collection_id={self.tools.id}&unit_price__lt=25",
+        ]:
+            with self.subTest(query_string=query_string):
+                facets = self.facets(query_string)
+                page = self.client.get(f"/store/products/?{query_string}").json()
+                count = page["count"]
+                self.assertEqual(
+                    sum(facet["count"] for facet in facets["collections"]), count
+                )
+                self.assertEqual(
+                    sum(bucket["count"] for bucket in facets["prices"]), count
+                )
+
+    def test_filters_narrow_every_facet(self):
+        facets = self.facets(f"search=hammer&collection_id={self.tools.id}")
+        self.assertEqual(
+            [(facet["title"], facet["count"]) for facet in facets["collections"]],
+            [("Tools", 3)],
+        )
+        self.assertEqual([bucket["count"] for bucket in facets["prices"]], [1, 1, 1])
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+
+from store.models import Cart, CartItem, Collection, Order, OrderItems, Product
+from store.tests.helpers import StoreTestCase, token_client
+
+
+class CreateOrderTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        collection = Collection.objects.create(title="Tools")
+        cls.hammer, cls.saw = [
+            Product.objects.create(
+                title=title, unit_price=10, inventory=3, collection=collection
+            )
+            for title in ["Hammer", "Saw"]
+        ]
+        cls.user = get_user_model().objects.create_user("customer")
+
+    def setUp(self):
+        super().setUp()
+        self.client = token_client(self.user)
+
+    def order(self, quantities):
+        cart = Cart.objects.create()
+        CartItem.objects.add_items(cart.id, quantities)
+        return cart, self.client.post(
+            "/store/orders/", {"cart_id": str(cart.id)}, format="json"
+        )
+
+    def get_inventory(self):
+        return dict(
+            Product.objects.filter(id__in=[self.hammer.id, self.saw.id]).values_list(
+                "id", "inventory"
+            )
+        )
+
+    def test_order_reserves_inventory_and_empties_the_cart(self):
+        cart, response = self.order({self.hammer.id: 2, self.saw.id: 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_inventory(), {self.hammer.id: 1, self.saw.id: 0})
+        self.assertEqual(
+            OrderItems.objects.filter(order_id=response.data["id"]).count(), 2
+        )
+        self.assertFalse(Cart.objects.filter(pk=cart.id).exists())
+
+    def test_overselling_is_rejected_without_reserving_anything(self):
+        cart, response = self.order({self.hammer.id: 1, self.saw.id: 4})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["items"]), [str(self.saw.id)])
+        self.assertEqual(self.get_inventory(), {self.hammer.id: 3, self.saw.id: 3})
+        self.assertFalse(Order.objects.exists())
+        self.assertTrue(Cart.objects.filter(pk=cart.id).exists())
+
+    def test_users_without_a_customer_profile_cannot_order(self):
+        user = get_user_model().objects.create_user("operator")
+        user.customer.delete()
+        self.client = token_client(user)
+        _, response = self.order({self.hammer.id: 1})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Order.objects.exists())
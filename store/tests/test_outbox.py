@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from store.models import Order, OutboxEvent
+from store.outbox import (
+    MAX_ATTEMPTS,
+    deliver_pending,
+    get_backoff,
+    publish,
+    purge_delivered,
+)
+from store.tests.helpers import StoreTestCase
+
+
+class DeliverPendingTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user("customer")
+        cls.order = Order.objects.create(customer=user.customer)
+
+    def publish_order_created(self):
+        return publish(
+            OutboxEvent.TOPIC_ORDER_CREATED,
+            order_id=self.order.id,
+            payment_status=self.order.payment_status,
+        )
+
+    def deliver_at(self, now):
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            return deliver_pending()
+
+    def test_events_are_delivered_in_order(self):
+        events = [self.publish_order_created() for _ in range(3)]
+        self.assertEqual(deliver_pending(), (3, False))
+        for event in events:
+            event.refresh_from_db()
+            self.assertEqual(event.status, OutboxEvent.STATUS_DELIVERED)
+            self.assertEqual(event.attempts, 1)
+            self.assertIsNotNone(event.delivered_at)
+        self.assertEqual(deliver_pending(), (0, False))
+
+    def test_failing_event_is_retried_with_backoff(self):
+        failing = publish("unknown")
+        waiting = self.publish_order_created()
+        now = timezone.now()
+
+        self.assertEqual(self.deliver_at(now), (0, True))
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(failing.attempts, 1)
+        self.assertIn("Unknown outbox topic", failing.last_error)
+        self.assertEqual(failing.next_attempt_at, now + timedelta(seconds=2))
+
+        # Not retried before it is due, and nothing behind it is delivered.
+        self.assertEqual(self.deliver_at(now + timedelta(seconds=1)), (0, True))
+        failing.refresh_from_db()
+        waiting.refresh_from_db()
+        self.assertEqual(failing.attempts, 1)
+        self.assertEqual(waiting.attempts, 0)
+
+        self.assertEqual(self.deliver_at(now + timedelta(seconds=3)), (0, True))
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 2)
+
+    def test_event_is_parked_after_max_attempts(self):
+        failing = publish("unknown")
+        waiting = self.publish_order_created()
+        now = timezone.now()
+
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.assertEqual(self.deliver_at(now), (0, True))
+            now += timedelta(seconds=get_backoff(MAX_ATTEMPTS))
+        self.assertEqual(self.deliver_at(now), (1, False))
+
+        failing.refresh_from_db()
+        waiting.refresh_from_db()
+        self.assertEqual(failing.status, OutboxEvent.STATUS_FAILED)
+        self.assertEqual(failing.attempts, MAX_ATTEMPTS)
+        self.assertEqual(waiting.status, OutboxEvent.STATUS_DELIVERED)
+
+    def test_backoff_is_capped(self):
+        self.assertEqual(get_backoff(1), 2)
+        self.assertEqual(get_backoff(5), 32)
+        self.assertEqual(get_backoff(20), 300)
+
+
+class PurgeDeliveredTests(StoreTestCase):
+    def test_only_old_delivered_events_are_purged(self):
+        now = timezone.now()
+        old = [
+            OutboxEvent(
+                topic="old",
+                payload={},
+                status=OutboxEvent.STATUS_DELIVERED,
+                delivered_at=now - timedelta(days=8),
+            )
+            for _ in range(5)
+        ]
+        kept = [
+            OutboxEvent(
+                topic="recent",
+                payload={},
+                status=OutboxEvent.STATUS_DELIVERED,
+                delivered_at=now,
+            ),
+            OutboxEvent(topic="pending", payload={}),
+            OutboxEvent(topic="failed", payload={}, status=OutboxEvent.STATUS_FAILED),
+        ]
+        OutboxEvent.objects.bulk_create(old + kept)
+
+        chunks = list(purge_delivered(now - timedelta(days=7), chunk_size=2))
+        self.assertEqual(chunks, [2, 2, 1])
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list("topic", flat=True)),
+            ["failed", "pending", "recent"],
+        )
@@ -0,0 +1,99 @@
+import base64
+
+from django.contrib.auth import get_user_model
+
+from store.models import Collection, Customer, Order, Product
+from store.tests.helpers import StoreTestCase, token_client
+
+
+class ProductKeysetPaginationTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        collection = Collection.objects.create(title="Tools")
+        for index in range(25):
+            # Repeated titles and prices make the id tie-breaker matter.
+            Product.objects.create(
+                title=f"Product {index % 7}",
+                unit_price=index % 3 + 1,
+                inventory=5,
+                collection=collection,
+            )
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            page = self.client.get(url).json()
+            pages.append(page)
+            ids += [product["id"] for product in page["results"]]
+            url = page["next"]
+        return ids, pages
+
+    def test_next_links_cover_every_product_once_in_order(self):
+        for ordering, expected in [
+            ("title", ["title", "id"]),
+            ("-unit_price", ["-unit_price", "-id"]),
+        ]:
+            with self.subTest(ordering=ordering):
+                ids, pages = self.walk(
+                    f"/store/products/?pagination=keyset&ordering={ordering}"
+                )
+                self.assertEqual(
+                    ids,
+                    list(
+                        Product.objects.order_by(*expected).values_list("id", flat=True)
+                    ),
+                )
+                self.assertEqual(len(pages), 3)
+                self.assertIsNone(pages[0]["previous"])
+                self.assertNotIn("count", pages[0])
+
+    def test_previous_links_walk_back_to_the_first_page(self):
+        ids, pages = self.walk("/store/products/?pagination=keyset")
+        back = []
+        url = pages[-1]["previous"]
+        while url:
+            page = self.client.get(url).json()
+            back = [product["id"] for product in page["results"]] + back
+            url = page["previous"]
+        self.assertEqual(back, ids[:20])
+
+    def test_total_is_only_counted_when_asked_for(self):
+        page = self.client.get(
+            "/store/products/?pagination=keyset&include_total=1"
+        ).json()
+        self.assertEqual(page["count"], 25)
+        self.assertTrue(page["count_is_exact"])
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ["zzz", '["x", 1, "sideways"]', '[null, 1, "next"]']:
+            if cursor.startswith("["):
+                cursor = base64.urlsafe_b64encode(cursor.encode()).decode()
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    "/store/products/?pagination=keyset&ordering=unit_price"
+                    f"&cursor={cursor}"
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class OrderKeysetPaginationTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user("customer")
+        cls.customer = Customer.objects.get(user=user)
+        Order.objects.bulk_create(Order(customer=cls.customer) for _ in range(25))
+
+    def test_orders_are_paged_newest_first(self):
+        client = token_client(self.customer.user)
+        ids, url = [], "/store/orders/"
+        while url:
+            page = client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 20)
+            ids += [order["id"] for order in page["results"]]
+            url = page["next"]
+        self.assertEqual(
+            ids,
+            list(
+                Order.objects.order_by("-placed_at", "-id").values_list("id", flat=True)
+            ),
+        )
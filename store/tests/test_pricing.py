@@ -0,0 +1,105 @@
+from decimal import Decimal
+from unittest import mock
+
+from store.models import Collection, Product, Promotion
+from store.pricing import recompute_effective_prices
+from store.tests.helpers import StoreTestCase
+
+
+class EffectivePriceTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        collection = Collection.objects.create(title="Tools")
+        cls.hammer, cls.saw, cls.drill = [
+            Product.objects.create(
+                title=title, unit_price=price, inventory=1, collection=collection
+            )
+            for title, price in [("Hammer", 10), ("Saw", 20), ("Drill", 40)]
+        ]
+        cls.half = Promotion.objects.create(description="Half", discount=0.5)
+        cls.fifth = Promotion.objects.create(description="Fifth", discount=0.2)
+        cls.hammer.promotions.add(cls.half)
+        cls.saw.promotions.add(cls.half, cls.fifth)
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch(
+            "store.signals.handlers.recompute_effective_prices",
+            wraps=recompute_effective_prices,
+        )
+        self.recompute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertPrices(self, hammer, saw, drill):
+        self.assertEqual(
+            dict(Product.objects.values_list("title", "effective_price")),
+            {"Hammer": Decimal(hammer), "Saw": Decimal(saw), "Drill": Decimal(drill)},
+        )
+
+    def assertRepriced(self, *products):
+        repriced = set()
+        for call in self.recompute.call_args_list:
+            repriced.update(call.args[0])
+        self.assertEqual(repriced, {product.id for product in products})
+
+    def test_best_promotion_and_tax_are_applied(self):
+        # Tax is 10%, the saw gets the better of its two promotions.
+        self.assertPrices("5.50", "11.00", "44.00")
+
+    def test_changing_a_discount_reprices_its_products(self):
+        self.half.discount = 0.1
+        self.half.save()
+        self.assertPrices("9.90", "17.60", "44.00")
+        self.assertRepriced(self.hammer, self.saw)
+
+    def test_changing_the_unit_price_reprices_the_product(self):
+        self.drill.unit_price = 50
+        self.drill.save()
+        self.assertEqual(self.drill.effective_price, Decimal("55.00"))
+        self.assertPrices("5.50", "11.00", "55.00")
+        self.assertRepriced(self.drill)
+
+        self.recompute.reset_mock()
+        self.drill.inventory = 5
+        self.drill.save()
+        self.assertRepriced()
+
+    def test_adding_and_removing_promotions_reprices_the_product(self):
+        self.drill.promotions.add(self.fifth)
+        self.assertPrices("5.50", "11.00", "35.20")
+        self.saw.promotions.remove(self.half)
+        self.assertPrices("5.50", "17.60", "35.20")
+        self.hammer.promotions.clear()
+        self.assertPrices("11.00", "17.60", "35.20")
+        self.assertRepriced(self.hammer, self.saw, self.drill)
+
+    def test_adding_and_removing_products_of_a_promotion_reprices_them(self):
+        self.fifth.product_set.add(self.drill)
+        self.assertPrices("5.50", "11.00", "35.20")
+        self.half.product_set.remove(self.saw)
+        self.assertPrices("5.50", "17.60", "35.20")
+        self.assertRepriced(self.saw, self.drill)
+
+    def test_clearing_a_promotions_products_reprices_them(self):
+        # The products are only known before the clear.
+        self.half.product_set.clear()
+        self.assertPrices("11.00", "17.60", "44.00")
+        self.assertRepriced(self.hammer, self.saw)
+
+    def test_deleting_a_promotion_reprices_its_products(self):
+        self.half.delete()
+        self.assertPrices("11.00", "17.60", "44.00")
+        self.assertRepriced(self.hammer, self.saw)
+
+    def test_products_are_filtered_and_ordered_by_effective_price(self):
+        def titles(query_string):
+            response = self.client.get(f"/store/products/?{query_string}")
+            return [product["title"] for product in response.json()["results"]]
+
+        self.assertEqual(titles("ordering=effective_price"), ["Hammer", "Saw", "Drill"])
+        self.assertEqual(
+            titles("ordering=-effective_price"), ["Drill", "Saw", "Hammer"]
+        )
+        self.assertEqual(
+            titles("effective_price__gt=6&effective_price__lt=44"), ["Saw"]
+        )
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+
+from store.models import (
+    Cart,
+    CartItem,
+    Collection,
+    DailyCollectionSales,
+    DailyProductSales,
+    Order,
+    Product,
+)
+from store.outbox import deliver_pending
+from store.sales import rebuild_rollups
+from store.tests.helpers import StoreTestCase, token_client
+
+
+class SalesRollupTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tools = Collection.objects.create(title="Tools")
+        cls.toys = Collection.objects.create(title="Toys")
+        cls.hammer, cls.saw = [
+            Product.objects.create(
+                title=title, unit_price=price, inventory=10, collection=cls.tools
+            )
+            for title, price in [("Hammer", 10), ("Saw", 25)]
+        ]
+        cls.customer = get_user_model().objects.create_user("customer")
+        cls.staff = get_user_model().objects.create_superuser("staff")
+
+    def place_order(self, quantities):
+        cart = Cart.objects.create()
+        CartItem.objects.add_items(cart.id, quantities)
+        response = token_client(self.customer).post(
+            "/store/orders/", {"cart_id": str(cart.id)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        deliver_pending()
+        return Order.objects.get(pk=response.data["id"])
+
+    def set_status(self, order, payment_status):
+        response = token_client(self.staff).patch(
+            f"/store/orders/{order.id}/",
+            {"payment_status": payment_status},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(deliver_pending(), (1, False))
+
+    def snapshot(self):
+        return [
+            sorted(
+                model.objects.exclude(orders=0, units=0, revenue=0).values_list(
+                    key, "payment_status", "orders", "units", "revenue"
+                )
+            )
+            for model, key in [
+                (DailyProductSales, "product_id"),
+                (DailyCollectionSales, "collection_id"),
+            ]
+        ]
+
+    def test_orders_are_added_to_the_rollups(self):
+        self.place_order({self.hammer.id: 2, self.saw.id: 1})
+        self.place_order({self.hammer.id: 1})
+        products, collections = self.snapshot()
+        self.assertEqual(
+            products,
+            [
+                (self.hammer.id, Order.PAYMENT_PENDING, 2, 3, 30),
+                (self.saw.id, Order.PAYMENT_PENDING, 1, 1, 25),
+            ],
+        )
+        self.assertEqual(
+            collections, [(self.tools.id, Order.PAYMENT_PENDING, 2, 4, 55)]
+        )
+
+    def test_status_changes_move_orders_between_statuses(self):
+        order = self.place_order({self.hammer.id: 2})
+        placed = self.snapshot()
+
+        self.set_status(order, Order.PAYMENT_COMPLETE)
+        products, collections = self.snapshot()
+        self.assertEqual(products, [(self.hammer.id, Order.PAYMENT_COMPLETE, 1, 2, 20)])
+        self.assertEqual(
+            collections, [(self.tools.id, Order.PAYMENT_COMPLETE, 1, 2, 20)]
+        )
+
+        self.set_status(order, Order.PAYMENT_PENDING)
+        self.assertEqual(self.snapshot(), placed)
+
+    def test_reversal_uses_the_collection_recorded_on_the_order(self):
+        order = self.place_order({self.hammer.id: 2, self.saw.id: 1})
+        placed = self.snapshot()
+
+        self.hammer.collection = self.toys
+        self.hammer.save()
+        self.set_status(order, Order.PAYMENT_FAILED)
+        _, collections = self.snapshot()
+        self.assertEqual(collections, [(self.tools.id, Order.PAYMENT_FAILED, 1, 3, 45)])
+
+        self.set_status(order, Order.PAYMENT_PENDING)
+        self.assertEqual(self.snapshot(), placed)
+
+    def test_rebuild_matches_the_live_rollups(self):
+        order = self.place_order({self.hammer.id: 2, self.saw.id: 1})
+        self.place_order({self.saw.id: 3})
+        self.hammer.collection = self.toys
+        self.hammer.save()
+        self.set_status(order, Order.PAYMENT_COMPLETE)
+        live = self.snapshot()
+
+        self.assertEqual(rebuild_rollups(chunk_size=1), 3)
+        self.assertEqual(self.snapshot(), live)
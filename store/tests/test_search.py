@@ -0,0 +1,100 @@
+from django.test import override_settings
+
+from store.models import Collection, Product, ProductSearchTerm
+from store.search import rebuild_index
+from store.tests.helpers import StoreTestCase
+
+
+@override_settings(STORE_SEARCH_BACKEND="inverted_index")
+class ProductSearchTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tools = Collection.objects.create(title="Tools")
+        cls.toys = Collection.objects.create(title="Toys")
+        cls.products = {
+            title: Product.objects.create(
+                title=title,
+                description=description,
+                unit_price=price,
+                inventory=1,
+                collection=collection,
+            )
+            for title, description, price, collection in [
+                ("Red hammer", "Steel head", 20, cls.tools),
+                ("Claw hammer", "A red handle", 15, cls.tools),
+                ("Toy hammer", "Red plastic, red paint", 5, cls.toys),
+                ("Blue saw", "Cuts wood", 25, cls.tools),
+                ("Hammers", "Plural", 30, cls.tools),
+            ]
+        }
+
+    def search(self, query_string):
+        response = self.client.get(f"/store/products/?{query_string}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def titles(self, query_string):
+        return [product["title"] for product in self.search(query_string)["results"]]
+
+    def test_every_term_must_match_as_a_whole_word(self):
+        self.assertEqual(
+            self.titles("search=red hammer"),
+            ["Red hammer", "Toy hammer", "Claw hammer"],
+        )
+        self.assertEqual(self.titles("search=hammer saw"), [])
+        # No prefix matches, "hammer" does not find "Hammers".
+        self.assertNotIn("Hammers", self.titles("search=hammer"))
+
+    def test_results_are_ordered_by_relevance(self):
+        # A title match weighs 3, each description match 1, ties go by id.
+        self.assertEqual(
+            self.titles("search=red"), ["Red hammer", "Toy hammer", "Claw hammer"]
+        )
+        self.assertEqual(
+            self.titles("search=red&ordering=unit_price"),
+            ["Toy hammer", "Claw hammer", "Red hammer"],
+        )
+
+    def test_queries_without_terms_match_nothing(self):
+        self.assertEqual(self.search("search=a ,")["count"], 0)
+        self.assertEqual(self.search("search=")["count"], len(self.products))
+
+    def test_search_is_combined_with_filters_and_pagination(self):
+        page = self.search(
+            f"search=hammer&collection_id={self.tools.id}&unit_price__lt=25&page=1"
+        )
+        self.assertEqual(page["count"], 2)
+        self.assertEqual(
+            [product["title"] for product in page["results"]],
+            ["Red hammer", "Claw hammer"],
+        )
+
+    def test_changed_products_are_reindexed(self):
+        saw = self.products["Blue saw"]
+        # Cached list pages are invalidated once each write commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            saw.title = "Blue hammer saw"
+            saw.save()
+        self.assertIn("Blue hammer saw", self.titles("search=hammer"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            saw.description = "Cuts metal"
+            saw.save()
+        self.assertEqual(self.titles("search=metal"), ["Blue hammer saw"])
+        self.assertEqual(self.titles("search=wood"), [])
+
+        saw_id = saw.id
+        with self.captureOnCommitCallbacks(execute=True):
+            saw.delete()
+        self.assertEqual(self.titles("search=metal"), [])
+        self.assertFalse(ProductSearchTerm.objects.filter(product_id=saw_id).exists())
+
+    def test_rebuild_index_matches_the_live_index(self):
+        def postings():
+            return sorted(
+                ProductSearchTerm.objects.values_list("product_id", "term", "weight")
+            )
+
+        live = postings()
+        self.assertEqual(rebuild_index(chunk_size=2), len(self.products))
+        self.assertEqual(postings(), live)
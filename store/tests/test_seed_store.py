@@ -0,0 +1,49 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from store.models import Order, OrderItems, Product
+from store.tests.helpers import StoreTestCase
+
+
+class SeedStoreTests(StoreTestCase):
+    def seed(self, **options):
+        stdout = StringIO()
+        call_command(
+            "seed_store",
+            products=20,
+            customers=3,
+            orders=30,
+            carts=2,
+            chunk_size=10,
+            stdout=stdout,
+            **options,
+        )
+        return stdout.getvalue()
+
+    def test_orders_are_backdated(self):
+        started = timezone.now()
+        self.seed()
+        self.assertEqual(Order.objects.count(), 30)
+        # Spread over the past year, not stamped with the time of the run.
+        self.assertGreater(
+            Order.objects.filter(placed_at__lt=started - timedelta(days=1)).count(),
+            25,
+        )
+        self.assertFalse(OrderItems.objects.filter(collection=None).exists())
+
+    def test_reseeding_replaces_the_data(self):
+        self.seed()
+        products = list(Product.objects.values_list("id", "title", "unit_price"))
+        self.seed()
+        self.assertEqual(
+            list(Product.objects.values_list("id", "title", "unit_price")), products
+        )
+        self.assertEqual(Order.objects.count(), 30)
+
+    def test_sqlite_uses_a_single_worker(self):
+        output = self.seed(workers=4)
+        self.assertIn("using one worker", output)
+        self.assertEqual(Product.objects.count(), 20)
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+
+from store.models import Collection, Product
+from store.tests.helpers import StoreTestCase
+from tags.models import LABEL_CACHE_KEY, Tag, TaggedItem, get_label_cache
+
+
+class ProductTagTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tools = Collection.objects.create(title="Tools")
+        cls.toys = Collection.objects.create(title="Toys")
+        cls.red, cls.steel, cls.sale = [
+            Tag.objects.create(label=label) for label in ["Red", "Steel", "Sale"]
+        ]
+        product_type = ContentType.objects.get_for_model(Product)
+        for title, collection, tags in [
+            ("Hammer", cls.tools, [cls.red, cls.steel]),
+            ("Saw", cls.tools, [cls.steel]),
+            ("Ball", cls.toys, [cls.red, cls.sale]),
+            ("Kite", cls.toys, []),
+        ]:
+            product = Product.objects.create(
+                title=title, unit_price=10, inventory=1, collection=collection
+            )
+            for tag in tags:
+                TaggedItem.objects.create(
+                    tag=tag, content_type=product_type, object_id=product.id
+                )
+
+    def titles(self, query_string):
+        response = self.client.get(f"/store/products/?ordering=title&{query_string}")
+        self.assertEqual(response.status_code, 200)
+        return [product["title"] for product in response.json()["results"]]
+
+    def test_products_with_any_tag(self):
+        red, steel = self.red.id, self.steel.id
+        self.assertEqual(self.titles(f"tag={red}"), ["Ball", "Hammer"])
+        self.assertEqual(self.titles(f"tag={red},{steel}"), ["Ball", "Hammer", "Saw"])
+        self.assertEqual(
+            self.titles(f"tag={red}&tag={steel}&tag_mode=or"),
+            ["Ball", "Hammer", "Saw"],
+        )
+
+    def test_products_with_every_tag(self):
+        red, steel = self.red.id, self.steel.id
+        self.assertEqual(self.titles(f"tag={red},{steel}&tag_mode=and"), ["Hammer"])
+        # Repeated params are all used, not only the last one.
+        self.assertEqual(self.titles(f"tag={red}&tag={steel}&tag_mode=and"), ["Hammer"])
+        self.assertEqual(
+            self.titles(f"tag={red}&tag={steel},{self.sale.id}&tag_mode=and"), []
+        )
+
+    def test_invalid_tag_ids_are_rejected(self):
+        response = self.client.get("/store/products/?tag=1&tag=red")
+        self.assertEqual(response.status_code, 400)
+
+    def test_tag_counts_follow_the_filters(self):
+        def counts(query_string=""):
+            response = self.client.get(f"/store/products/tags/?{query_string}")
+            return [(tag["label"], tag["count"]) for tag in response.json()]
+
+        self.assertEqual(counts(), [("Red", 2), ("Steel", 2), ("Sale", 1)])
+        self.assertEqual(
+            counts(f"collection_id={self.tools.id}"), [("Steel", 2), ("Red", 1)]
+        )
+        self.assertEqual(
+            counts(f"tag={self.red.id}&tag={self.steel.id}&tag_mode=and"),
+            [("Red", 1), ("Steel", 1)],
+        )
+
+    def test_labels_are_cached_for_a_limited_time_and_dropped_on_rename(self):
+        cache = get_label_cache()
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            self.assertEqual(
+                Tag.objects.get_labels([self.red.id]), {self.red.id: "Red"}
+            )
+        self.assertIsNotNone(set_many.call_args.args[1])
+
+        with self.assertNumQueries(0):
+            Tag.objects.get_labels([self.red.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.red.label = "Crimson"
+            self.red.save()
+        self.assertIsNone(cache.get(LABEL_CACHE_KEY.format(self.red.id)))
+        self.assertEqual(
+            Tag.objects.get_labels([self.red.id]), {self.red.id: "Crimson"}
+        )
@@ -0,0 +1,49 @@
+import time
+from unittest import mock
+
+from store.models import Cart, Collection, Product
+from store.tests.helpers import StoreTestCase
+from store.throttling import TokenBucketThrottle
+
+
+@mock.patch.object(
+    TokenBucketThrottle, "THROTTLE_RATES", {"cart_writes": "3/min", "checkout": None}
+)
+class CartWriteThrottleTests(StoreTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        collection = Collection.objects.create(title="Tools")
+        cls.product = Product.objects.create(
+            title="Hammer", unit_price=10, inventory=5, collection=collection
+        )
+
+    def add_item(self, cart):
+        return self.client.post(
+            f"/store/carts/{cart.id}/items/",
+            {"product_id": self.product.id, "quantity": 1},
+            format="json",
+        )
+
+    def test_writes_beyond_the_burst_are_throttled(self):
+        cart = Cart.objects.create()
+        statuses = [self.add_item(cart).status_code for _ in range(4)]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+
+        response = self.add_item(cart)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        # Reads are never throttled.
+        self.assertEqual(
+            self.client.get(f"/store/carts/{cart.id}/items/").status_code, 200
+        )
+
+    def test_the_bucket_refills_over_time(self):
+        cart = Cart.objects.create()
+        for _ in range(3):
+            self.add_item(cart)
+        self.assertEqual(self.add_item(cart).status_code, 429)
+
+        now = time.time()
+        with mock.patch.object(TokenBucketThrottle, "timer", lambda self: now + 20):
+            self.assertEqual(self.add_item(cart).status_code, 201)
+            self.assertEqual(self.add_item(cart).status_code, 429)
@@ -0,0 +1,63 @@
+import math
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Throttles writes per client with a token bucket kept in the cache.
+
+    The rate `"<n>/<period>"` of the throttle's scope sets both the bucket
+    size and its refill speed: a client may burst `n` writes, then gets one
+    more every `period / n`. Reads are never throttled. Clients are keyed
+    by user id, or by address when anonymous.
+
+    The bucket is stored as the time at which it will be full again, in
+    microseconds, and every write reserves its token with an atomic `incr`
+    (undone by `decr` when refused), so concurrent writes cannot spend the
+    same token. The key expires once the bucket is full, which keeps idle
+    clients from saving up more than `n` tokens.
+    """
+
+    cache_format = "throttle:bucket:%(scope)s:%(ident)s"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None or request.method in SAFE_METHODS:
+            return True
+        self.key = self.get_cache_key(request, view)
+        now = int(self.timer() * 1_000_000)
+        capacity = int(self.duration * 1_000_000)
+        interval = capacity // self.num_requests
+
+        self.cache.add(self.key, now, self.duration)
+        try:
+            full_at = self.cache.incr(self.key, interval)
+        except ValueError:
+            # Expired between add and incr, the bucket is full again.
+            self.cache.add(self.key, now, self.duration)
+            full_at = self.cache.incr(self.key, interval)
+        self.excess = full_at - now - capacity
+        if self.excess > 0:
+            self.cache.decr(self.key, interval)
+            return self.throttle_failure()
+        self.cache.touch(self.key, math.ceil((full_at - now) / 1_000_000))
+        return True
+
+    def wait(self):
+        return self.excess / 1_000_000
+
+
+class CartWriteThrottle(TokenBucketThrottle):
+    scope = "cart_writes"
+
+
+class CheckoutThrottle(TokenBucketThrottle):
+    scope = "checkout"
@@ -1,5 +1,6 @@
+from django.urls import path
 from rest_framework_nested import routers
-from . import views
+from . import async_views, views
 
 router = routers.DefaultRouter()
 router.register("products", views.ProductViewSet, basename="products")
@@ -7,6 +8,15 @@ router.register("collections", views.CollectionViewSet)
 router.register("carts", views.CartViewSet)
 router.register("customers", views.CustomerViewSet)
 router.register("orders", views.OrderViewSet, basename="orders")
+router.register("catalog", views.CatalogViewSet, basename="catalog")
+router.register(
+    "reports/product-sales", views.ProductSalesViewSet, basename="product-sales"
+)
+router.register(
+    "reports/collection-sales",
+    views.CollectionSalesViewSet,
+    basename="collection-sales",
+)
 
 
 products_router = routers.NestedDefaultRouter(router, "products", lookup="product")
@@ -16,4 +26,21 @@ products_router.register("images", views.ProductImageViewSet, basename="product-
 
 carts_router = routers.NestedDefaultRouter(router, "carts", lookup="cart")
 carts_router.register("items", views.CartItemViewSet, basename="cart-items")
-urlpatterns = router.urls + products_router.urls + carts_router.urls
+
+# Read-only async counterparts of the hottest endpoints, for ASGI servers.
+async_urlpatterns = [
+    path("async/products/", async_views.product_list, name="async-products-list"),
+    path(
+        "async/products/<int:pk>/",
+        async_views.product_detail,
+        name="async-products-detail",
+    ),
+    path(
+        "async/collections/",
+        async_views.collection_list,
+        name="async-collections-list",
+    ),
+    path("async/carts/<str:pk>/", async_views.cart_detail, name="async-carts-detail"),
+]
+
+urlpatterns = router.urls + products_router.urls + carts_router.urls + async_urlpatterns
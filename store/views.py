@@ -1,25 +1,54 @@
-from django.db.models import Count
+from uuid import UUID
+from django.conf import settings
+from django.db.models import Prefetch, Sum
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, GenericViewSet
+from rest_framework.viewsets import ModelViewSet, GenericViewSet, ViewSet
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.mixins import (
     CreateModelMixin,
+    ListModelMixin,
     RetrieveModelMixin,
     DestroyModelMixin,
 )
 
+from core.authentication import CustomerJWTAuthentication, get_customer_id
 from store.permissions import FullDjangoModelPermissions, IsAdminOrReadOnly
-from .pagination import DefaultPagination
-from .filters import ProductFilter
+from store.throttling import CartWriteThrottle, CheckoutThrottle
+from tags.models import Tag, TaggedItem
+from .cache import (
+    GENERATION_SCOPE,
+    CachedResponseMixin,
+    collection_scope,
+    product_scope,
+)
+from .catalog import CATALOGS, FORMATS, export_lines, import_rows, read_rows
+from .conditional import ConditionalGetMixin
+from .facets import facet_counts
+from .pagination import (
+    DefaultPagination,
+    OrderKeysetPagination,
+    ProductKeysetPagination,
+)
+from .filters import (
+    CollectionSalesFilter,
+    OrderFilter,
+    ProductFilter,
+    ProductSalesFilter,
+    ProductSearchFilter,
+)
 from .models import (
     Cart,
     CartItem,
     Collection,
     Customer,
+    DailyCollectionSales,
+    DailyProductSales,
     Order,
     OrderItems,
     Product,
@@ -28,6 +57,7 @@ from .models import (
 )
 from .serializers import (
     AddCartItemSerializer,
+    BulkAddCartItemSerializer,
     CartItemSerializer,
     CartSerializer,
     CollectionSerializer,
@@ -35,26 +65,103 @@ from .serializers import (
     CustomerSerializer,
     OrderSerializer,
     ProductImageSerializer,
+    ProductListSerializer,
     ProductSerializer,
     ReviewSerializer,
     UpdateCartItemSerializer,
     UpdateOrderSerializer,
+    serialize_cart,
 )
 
 
 # Create your views here.
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
     queryset = Product.objects.prefetch_related("images").all()
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_class = ProductFilter
     pagination_class = DefaultPagination
-    search_fields = ["title", "description"]
-    ordering_fields = ["unit_price", "last_update"]
+    ordering_fields = ["title", "unit_price", "effective_price", "last_update"]
+    cache_query_params = [
+        "collection_id",
+        "tag",
+        "tag_mode",
+        "unit_price__gt",
+        "unit_price__lt",
+        "effective_price__gt",
+        "effective_price__lt",
+        "search",
+        "ordering",
+        "page",
+        "pagination",
+        "cursor",
+        "include_total",
+    ]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            query_params = self.request.query_params
+            if "cursor" in query_params or query_params.get("pagination") == "keyset":
+                self._paginator = ProductKeysetPagination()
+        return super().paginator
+
+    def get_cache_scopes(self):
+        collection_id = self.request.query_params.get("collection_id", "")
+        if self.action == "list" and collection_id.isdigit():
+            return [collection_scope(int(collection_id))]
+        return super().get_cache_scopes()
+
+    def get_validator_scopes(self):
+        return [GENERATION_SCOPE] + self.get_cache_scopes()
+
+    @property
+    def fast_list(self):
+        return self.action == "list" and getattr(
+            settings, "STORE_FAST_PRODUCT_LIST", False
+        )
+
+    def get_queryset(self):
+        if self.fast_list:
+            return Product.objects.values(*ProductListSerializer.value_fields)
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.fast_list:
+            return ProductListSerializer
+        return super().get_serializer_class()
 
     def get_serializer_context(self):
         return {"request": self.request}
 
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        """
+        Collection and price range counts for the products matching the
+        current filters and search, for the catalog sidebar.
+        """
+        return self.cached_response(self.get_facets, request)
+
+    def get_facets(self, request):
+        products = self.filter_queryset(Product.objects.all())
+        return Response(facet_counts(products))
+
+    @action(detail=False, methods=["GET"])
+    def tags(self, request):
+        """
+        Per-tag product counts for the products matching the current
+        filters, for building tag facets next to a product list.
+        """
+        products = self.filter_queryset(self.get_queryset()).order_by().values("id")
+        counts = list(TaggedItem.objects.counts(Product, products))
+        labels = Tag.objects.get_labels(tag_id for tag_id, _ in counts)
+        return Response(
+            [
+                {"id": tag_id, "label": labels.get(tag_id), "count": count}
+                for tag_id, count in counts
+            ]
+        )
+
     def destroy(self, request, *args, **kwargs):
         if OrderItems.objects.filter(product_id=kwargs["pk"]).count() > 0:
             return Response(
@@ -64,8 +171,8 @@ class ProductViewSet(ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class CollectionViewSet(ModelViewSet):
-    queryset = Collection.objects.annotate(products_count=Count("products")).all()
+class CollectionViewSet(ConditionalGetMixin, ModelViewSet):
+    queryset = Collection.objects.all()
     serializer_class = CollectionSerializer
     permission_classes = [IsAdminOrReadOnly]
 
@@ -92,12 +199,25 @@ class ReviewViewSet(ModelViewSet):
 class CartViewSet(
     CreateModelMixin, RetrieveModelMixin, DestroyModelMixin, GenericViewSet
 ):
-    queryset = Cart.objects.prefetch_related("items__product").all()
+    queryset = Cart.objects.all()
     serializer_class = CartSerializer
+    throttle_classes = [CartWriteThrottle]
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            cart_id = UUID(kwargs["pk"])
+        except ValueError:
+            raise NotFound()
+
+        rows = list(CartItem.objects.summary(cart_id))
+        if not rows and not Cart.objects.filter(pk=cart_id).exists():
+            raise NotFound()
+        return Response(serialize_cart(cart_id, rows))
 
 
 class CartItemViewSet(ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete"]
+    throttle_classes = [CartWriteThrottle]
 
     def get_queryset(self):
         return CartItem.objects.filter(cart_id=self.kwargs["cart_pk"]).select_related(
@@ -108,21 +228,38 @@ class CartItemViewSet(ModelViewSet):
         return {"cart_id": self.kwargs["cart_pk"]}
 
     def get_serializer_class(self):
-        if self.request.method == "POST":
+        if self.action == "bulk":
+            return BulkAddCartItemSerializer
+        elif self.request.method == "POST":
             return AddCartItemSerializer
         elif self.request.method == "PATCH":
             return UpdateCartItemSerializer
         return CartItemSerializer
 
+    @action(detail=False, methods=["POST"])
+    def bulk(self, request, cart_pk=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart_items = serializer.save()
+        serializer = AddCartItemSerializer(cart_items, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
 class CustomerViewSet(ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [FullDjangoModelPermissions]
 
-    @action(detail=False, methods=["GET", "PUT"], permission_classes=[IsAuthenticated])
+    @action(
+        detail=False,
+        methods=["GET", "PUT"],
+        permission_classes=[IsAuthenticated],
+        authentication_classes=[CustomerJWTAuthentication],
+    )
     def me(self, request):
-        customer = Customer.objects.get(user_id=request.user.id)
+        customer = Customer.objects.filter(pk=get_customer_id(request.user)).first()
+        if customer is None:
+            raise NotFound("This user has no customer profile.")
         if request.method == "GET":
             serializer = CustomerSerializer(customer)
             return Response(serializer.data)
@@ -135,15 +272,27 @@ class CustomerViewSet(ModelViewSet):
 
 class OrderViewSet(ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+    authentication_classes = [CustomerJWTAuthentication]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
+    pagination_class = OrderKeysetPagination
 
     def get_permissions(self):
         if self.request.method in ["PATCH", "DELETE"]:
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
+    def get_throttles(self):
+        if self.action == "create":
+            return [CheckoutThrottle()]
+        return []
+
     def create(self, request, *args, **kwargs):
+        customer_id = get_customer_id(self.request.user)
+        if customer_id is None:
+            raise PermissionDenied("Only users with a customer profile can order.")
         serializer = CreateOrderSerializer(
-            data=request.data, context={"user_id": self.request.user.id}
+            data=request.data, context={"customer_id": customer_id}
         )
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
@@ -158,18 +307,112 @@ class OrderViewSet(ModelViewSet):
         return OrderSerializer
 
     def get_queryset(self):
+        queryset = Order.objects.prefetch_related(
+            Prefetch("items", queryset=OrderItems.objects.select_related("product"))
+        )
         if self.request.user.is_staff:
-            return Order.objects.all()
-
-        customer_id = Customer.objects.only("id").get(user_id=self.request.user.id)
-        return Order.objects.filter(customer_id=customer_id)
+            return queryset
+        return queryset.filter(customer_id=get_customer_id(self.request.user))
 
 
-class ProductImageViewSet(ModelViewSet):
+class ProductImageViewSet(ConditionalGetMixin, ModelViewSet):
     serializer_class = ProductImageSerializer
+    # Image changes touch the product's last_update and versions.
+    last_modified_field = "product__last_update"
+
+    def get_validator_scopes(self):
+        return [GENERATION_SCOPE, product_scope(self.kwargs["product_pk"])]
 
     def get_serializer_context(self):
         return {"product_id": self.kwargs["product_pk"]}
 
     def get_queryset(self):
         return ProductImage.objects.filter(product_id=self.kwargs["product_pk"])
+
+
+class SalesReportViewSet(ListModelMixin, GenericViewSet):
+    """
+    Reads only the daily sales rollups, so a report costs O(days) rows.
+    Returns totals per day, or per `key` over the whole range with
+    `?group_by=<key>`.
+    """
+
+    authentication_classes = [CustomerJWTAuthentication]
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    pagination_class = DefaultPagination
+    key = None
+
+    def list(self, request, *args, **kwargs):
+        group_by = "day"
+        if request.query_params.get("group_by") == self.key:
+            group_by = f"{self.key}_id"
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values(group_by)
+            .annotate(orders=Sum("orders"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by(group_by)
+        )
+        return self.get_paginated_response(self.paginate_queryset(rows))
+
+
+class ProductSalesViewSet(SalesReportViewSet):
+    queryset = DailyProductSales.objects.all()
+    filterset_class = ProductSalesFilter
+    key = "product"
+
+
+class CollectionSalesViewSet(SalesReportViewSet):
+    queryset = DailyCollectionSales.objects.all()
+    filterset_class = CollectionSalesFilter
+    key = "collection"
+
+
+class CatalogViewSet(ViewSet):
+    """
+    Bulk catalog maintenance for staff: `GET catalog/<kind>/export/` streams
+    a table as CSV (or NDJSON with `?output=ndjson`) and
+    `POST catalog/<kind>/import/` upserts rows from a `text/csv` or
+    `application/x-ndjson` body, or from a multipart `file`.
+    """
+
+    authentication_classes = [CustomerJWTAuthentication]
+    permission_classes = [IsAdminUser]
+    lookup_value_regex = "|".join(CATALOGS)
+
+    @action(detail=True, methods=["GET"])
+    def export(self, request, pk=None):
+        file_format = request.query_params.get("output", "csv")
+        if file_format not in FORMATS:
+            raise ValidationError({"output": [f"Choose one of {', '.join(FORMATS)}."]})
+        response = StreamingHttpResponse(
+            export_lines(pk, file_format), content_type=FORMATS[file_format]
+        )
+        response["Content-Disposition"] = f'attachment; filename="{pk}.{file_format}"'
+        return response
+
+    @action(detail=True, methods=["POST"], url_path="import")
+    def import_rows(self, request, pk=None):
+        if request.content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                raise ValidationError({"file": ["No file was submitted."]})
+            chunks = upload
+            file_format = "csv" if upload.name.endswith(".csv") else "ndjson"
+        else:
+            chunks = request.stream or []
+            file_format = next(
+                (
+                    name
+                    for name, content_type in FORMATS.items()
+                    if request.content_type.startswith(content_type)
+                ),
+                None,
+            )
+            if file_format is None:
+                raise ValidationError(
+                    {"detail": [f"Send {' or '.join(FORMATS.values())}."]}
+                )
+
+        summary = import_rows(pk, read_rows(pk, chunks, file_format))
+        return Response(summary)
@@ -59,6 +59,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.AdmissionControlMiddleware",
+    "core.middleware.SQLInstrumentationMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -103,6 +106,15 @@ DATABASES = {
     }
 }
 
+# Aliases in DATABASES that replicate "default". Safe requests read the
+# catalog from them, see core.routers.ReplicaRouter.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+# How long a client reads from the primary after it wrote something.
+DATABASE_REPLICA_PIN_SECONDS = 5
+# How long a replica that refused a connection is left alone.
+DATABASE_REPLICA_RETRY_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -153,9 +165,21 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    # Token buckets per client, see store.throttling.
+    "DEFAULT_THROTTLE_RATES": {
+        "cart_writes": "60/min",
+        "checkout": "10/min",
+    },
 }
 
-SIMPLE_JWT = {"AUTH_HEADER_TYPES": ("JWT",), "ACCESS_TOKEN_LIFETIME": timedelta(days=2)}
+SIMPLE_JWT = {
+    "AUTH_HEADER_TYPES": ("JWT",),
+    # Customer requests trust the token's claims (see
+    # core.authentication.CustomerJWTAuthentication), so a deactivated
+    # customer keeps access until the token expires.
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
+    "TOKEN_OBTAIN_SERIALIZER": "core.serializers.TokenObtainPairSerializer",
+}
 
 AUTH_USER_MODEL = "core.User"
 
@@ -174,7 +198,28 @@ EMAIL_HOST_PASSWORD = ""
 EMAIL_PORT = 2525
 DEFAULT_FROM_EMAIL = "from@wassim.com"
 
-DEBUG_TOOLBAR_CONFIG = {"SHOW_TOOLBAR_CALLBACK": lambda request: True}
+DEBUG_TOOLBAR_CONFIG = {"SHOW_TOOLBAR_CALLBACK": lambda request: DEBUG}
+
+SQL_INSTRUMENTATION = {
+    "SAMPLE_RATE": 1.0 if DEBUG else 0.05,
+    "HEADERS": DEBUG,
+    "N_PLUS_ONE_THRESHOLD": 5,
+}
+
+# Overrides for core.middleware.ADMISSION_CONTROL_DEFAULTS.
+ADMISSION_CONTROL = {
+    "TARGET_LATENCY_MS": 500,
+    "MAX_QUEUE_MS": 2000,
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "storefront.sql": {"handlers": ["console"], "level": "INFO"},
+    },
+}
 
 CELERY_BROKER_URL = "redis://redis:6379/1"
 CELERY_BEAT_SCHEDULE = {
@@ -182,5 +227,52 @@ CELERY_BEAT_SCHEDULE = {
         "task": "playground.tasks.notify_customers",
         "schedule": 5,
         "args": ["Hello World"],
+    },
+    "deliver_outbox_events": {
+        "task": "store.tasks.deliver_outbox_events",
+        "schedule": 2,
+    },
+    "purge_carts": {
+        "task": "store.tasks.purge_carts",
+        "schedule": 60 * 60,
+    },
+    "purge_outbox_events": {
+        "task": "store.tasks.purge_outbox_events",
+        "schedule": 60 * 60,
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://redis:6379/2",
     }
 }
+
+STORE_CACHE_TIMEOUT = 10 * 60
+
+# Cache of tag labels, entries are also dropped when a tag is renamed or deleted.
+TAGS_CACHE_ALIAS = "default"
+TAGS_LABEL_CACHE_TIMEOUT = 60 * 60
+
+# Serialize product list pages from values() rows instead of model instances.
+STORE_FAST_PRODUCT_LIST = True
+
+# Added on top of the discounted price, as a fraction.
+STORE_TAX_RATE = "0.10"
+
+# Carts older than this are deleted by the purge_carts beat task.
+STORE_CART_TTL_DAYS = 30
+
+# Delivered outbox events older than this are deleted by purge_outbox_events.
+STORE_OUTBOX_RETENTION_DAYS = 7
+
+# Sizes (longest side, in pixels) and formats rendered for each ProductImage.
+STORE_IMAGE_VARIANTS = {
+    "thumb": {"size": 200, "format": "JPEG"},
+    "medium": {"size": 800, "format": "JPEG"},
+    "webp": {"size": 800, "format": "WEBP"},
+}
+
+# Upper bounds of the unit_price ranges counted by the products facets endpoint.
+STORE_PRICE_BUCKETS = [10, 25, 50, 100]
@@ -0,0 +1,52 @@
+"""
+Self-contained settings for running the project, its benchmarks and
+management commands locally against SQLite, with no MySQL, Redis or SMTP.
+
+    python manage.py test --settings=storefront.test_settings
+    python manage.py benchmark_endpoints --settings=storefront.test_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"timeout": 20, "transaction_mode": "IMMEDIATE"},
+    },
+    # A second connection to the same file stands in for a replica with no
+    # lag, so replica routing runs locally; test databases mirror "default".
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+DATABASE_REPLICAS = ["replica"]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware != "debug_toolbar.middleware.DebugToolbarMiddleware"
+]
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+CELERY_TASK_ALWAYS_EAGER = True
+
+SQL_INSTRUMENTATION = {**SQL_INSTRUMENTATION, "LOG": False}
+
+SILENCED_SYSTEM_CHECKS = ["debug_toolbar.W001"]
+
+# The toolbar middleware is removed above, so it has nothing to check in tests.
+DEBUG_TOOLBAR_CONFIG = {**DEBUG_TOOLBAR_CONFIG, "IS_RUNNING_TESTS": False}
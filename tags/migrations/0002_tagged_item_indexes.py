@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('tags', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taggeditem',
+            index=models.Index(fields=['content_type', 'object_id', 'tag'], name='tags_tagged_content_ca264d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taggeditem',
+            index=models.Index(fields=['content_type', 'tag', 'object_id'], name='tags_tagged_content_7b6d69_idx'),
+        ),
+    ]
@@ -1,18 +1,95 @@
+from django.conf import settings
+from django.core.cache import caches
 from django.db import models
+from django.db.models import Count
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 
+LABEL_CACHE_KEY = "tags:label:{}"
+
+
+def get_label_cache():
+    return caches[getattr(settings, "TAGS_CACHE_ALIAS", "default")]
+
+
+class TagManager(models.Manager):
+    def get_labels(self, tag_ids):
+        """
+        Maps tag ids to labels, reading through the cache so facet and
+        filter responses don't join the tag table for display names.
+        """
+        cache = get_label_cache()
+        keys = {LABEL_CACHE_KEY.format(tag_id): tag_id for tag_id in set(tag_ids)}
+        labels = {keys[key]: label for key, label in cache.get_many(keys).items()}
+        missing = [tag_id for tag_id in keys.values() if tag_id not in labels]
+        if missing:
+            found = dict(self.filter(id__in=missing).values_list("id", "label"))
+            cache.set_many(
+                {
+                    LABEL_CACHE_KEY.format(tag_id): label
+                    for tag_id, label in found.items()
+                },
+                getattr(settings, "TAGS_LABEL_CACHE_TIMEOUT", 60 * 60),
+            )
+            labels.update(found)
+        return labels
+
 
 # Create your models here.
 class Tag(models.Model):
+    objects = TagManager()
     label = models.CharField(max_length=255)
 
     def __str__(self):
         return self.label
 
 
+class TaggedItemManager(models.Manager):
+    def for_model(self, model):
+        return self.filter(content_type=ContentType.objects.get_for_model(model))
+
+    def object_ids(self, model, tag_ids, match_all=False):
+        """
+        A values queryset of the ids of `model` objects tagged with any of
+        `tag_ids`, or with all of them when `match_all` is set. Meant to be
+        used as an `id__in` subquery.
+        """
+        tag_ids = set(tag_ids)
+        items = self.for_model(model).filter(tag_id__in=tag_ids)
+        if match_all:
+            items = (
+                items.values("object_id")
+                .annotate(matched=Count("tag_id", distinct=True))
+                .filter(matched=len(tag_ids))
+            )
+        return items.values("object_id")
+
+    def counts(self, model, object_ids):
+        """
+        `(tag_id, count)` pairs for the objects in `object_ids`, most used
+        tags first, computed in one grouped query.
+        """
+        return (
+            self.for_model(model)
+            .filter(object_id__in=object_ids)
+            .values("tag_id")
+            .annotate(count=Count("object_id", distinct=True))
+            .order_by("-count", "tag_id")
+            .values_list("tag_id", "count")
+        )
+
+
 class TaggedItem(models.Model):
+    objects = TaggedItemManager()
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveBigIntegerField()
     content_object = GenericForeignKey()
+
+    class Meta:
+        indexes = [
+            # Tags of an object, and objects counted per tag for facets.
+            models.Index(fields=["content_type", "object_id", "tag"]),
+            # Objects carrying a tag, for filtering.
+            models.Index(fields=["content_type", "tag", "object_id"]),
+        ]
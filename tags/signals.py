@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tags.models import LABEL_CACHE_KEY, Tag, get_label_cache
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def forget_tag_label(sender, instance, **kwargs):
+    key = LABEL_CACHE_KEY.format(instance.id)
+    transaction.on_commit(lambda: get_label_cache().delete(key))